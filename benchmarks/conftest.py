@@ -0,0 +1,165 @@
+import datetime
+from pathlib import Path
+
+import pytest
+import yaml
+from resdata.summary import Summary
+
+from stea import SteaInputKeys, SteaKeys
+
+START_DATE = datetime.date(2020, 1, 1)
+CONFIG_DATE = datetime.datetime(2020, 1, 1, 12, 0, 0)
+PROJECT_ID = 1234
+PROJECT_VERSION = 1
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("stea benchmarks")
+    group.addoption(
+        "--bench-wells",
+        type=int,
+        default=200,
+        help="Number of wells in the synthetic summary case, 5 vectors per well",
+    )
+    group.addoption(
+        "--bench-years",
+        type=int,
+        default=30,
+        help="Number of simulated years in the synthetic summary case",
+    )
+    group.addoption(
+        "--bench-steps-per-year",
+        type=int,
+        default=52,
+        help="Number of timesteps per year in the synthetic summary case",
+    )
+    group.addoption(
+        "--bench-profiles",
+        type=int,
+        default=5000,
+        help="Number of profiles in the synthetic stea project",
+    )
+    group.addoption(
+        "--bench-ecl-profiles",
+        type=int,
+        default=40,
+        help="Number of ecl-profiles in the synthetic config",
+    )
+
+
+@pytest.fixture(scope="session", name="bench_options")
+def fixture_bench_options(request):
+    return {
+        name: request.config.getoption(f"--bench-{name.replace('_', '-')}")
+        for name in ("wells", "years", "steps_per_year", "profiles", "ecl_profiles")
+    }
+
+
+def write_summary_case(case, wells, years, steps_per_year):
+    """Write a summary case with field totals and wells*5 well vectors, where
+    all rates are constant so the totals grow linearly."""
+    summary = Summary.writer(case, START_DATE, 10, 10, 10)
+    field_keys = ["FOPT", "FGPT", "FWPT", "FWIT"]
+    for key in field_keys:
+        summary.add_variable(key, unit="SM3")
+    well_keys = [
+        (key, f"W{well}")
+        for well in range(wells)
+        for key in ("WOPT", "WGPT", "WWPT", "WOPR", "WBHP")
+    ]
+    for key, well in well_keys:
+        summary.add_variable(key, wgname=well, unit="SM3")
+
+    days_per_step = 365.0 / steps_per_year
+    for step in range(years * steps_per_year + 1):
+        days = step * days_per_step
+        t_step = summary.add_t_step(step // steps_per_year + 1, sim_days=days)
+        for index, key in enumerate(field_keys):
+            t_step[key] = (index + 1) * 100 * days
+        for index, (key, well) in enumerate(well_keys):
+            t_step[f"{key}:{well}"] = index * days
+    summary.fwrite()
+
+
+def ecl_profile_keys(num_ecl_profiles, wells):
+    """Alternating field keys, which are repeated in the config like in the
+    README example, and well totals."""
+    keys = ["FOPT", "FGPT", "FWPT", "FWIT"]
+    return [
+        keys[index % len(keys)] if index % 2 == 0 else f"WOPT:W{index % wells}"
+        for index in range(num_ecl_profiles)
+    ]
+
+
+def project_data(num_profiles, num_ecl_profiles):
+    """A project where every ecl-profile description matches two profiles."""
+    profiles = []
+    for index in range(num_profiles):
+        profile = {
+            SteaKeys.PROFILE_ID: f"profile-{index}",
+            SteaKeys.UNIT: "Sm3" if index % 2 else "Bbl",
+            SteaKeys.MULTIPLE: "Mill",
+        }
+        if index < 2 * num_ecl_profiles:
+            profile[SteaInputKeys.PROFILE_KEY] = f"description-{index // 2}"
+        else:
+            profile[SteaInputKeys.PROFILE_KEY] = f"unused-{index}"
+        profiles.append(profile)
+    return {
+        SteaKeys.PROJECT_ID: PROJECT_ID,
+        SteaKeys.PROJECT_VERSION: PROJECT_VERSION,
+        SteaKeys.PROFILES: profiles,
+    }
+
+
+def stea_config(case, num_ecl_profiles, wells, years):
+    ecl_profiles = {}
+    for index, key in enumerate(ecl_profile_keys(num_ecl_profiles, wells)):
+        ecl_profile = {SteaInputKeys.ECL_KEY: key}
+        if index % 3 == 1:
+            ecl_profile[SteaInputKeys.START_DATE] = datetime.date(
+                START_DATE.year + 1, 7, 1
+            )
+        if index % 3 == 2:  # noqa: PLR2004
+            ecl_profile[SteaInputKeys.END_YEAR] = START_DATE.year + years // 2
+            ecl_profile[SteaInputKeys.ECL_MULT] = [1.1] * 5
+        ecl_profiles[f"description-{index}"] = ecl_profile
+    return {
+        SteaInputKeys.CONFIG_DATE: CONFIG_DATE,
+        SteaInputKeys.PROJECT_ID: PROJECT_ID,
+        SteaInputKeys.PROJECT_VERSION: PROJECT_VERSION,
+        SteaInputKeys.ECL_PROFILES: ecl_profiles,
+        SteaInputKeys.RESULTS: ["NPV", "IRR"],
+        SteaInputKeys.ECL_CASE: str(case),
+    }
+
+
+@pytest.fixture(scope="session", name="bench_dir")
+def fixture_bench_dir(tmp_path_factory, bench_options):
+    """A directory with the synthetic summary case CASE, and the stea config
+    stea.yml using it."""
+    bench_dir = tmp_path_factory.mktemp("stea_bench")
+    case = bench_dir / "CASE"
+    write_summary_case(
+        str(case),
+        bench_options["wells"],
+        bench_options["years"],
+        bench_options["steps_per_year"],
+    )
+    (bench_dir / "stea.yml").write_text(
+        yaml.dump(
+            stea_config(
+                case,
+                bench_options["ecl_profiles"],
+                bench_options["wells"],
+                bench_options["years"],
+            )
+        ),
+        encoding="utf-8",
+    )
+    return Path(bench_dir)
+
+
+@pytest.fixture(scope="session", name="bench_project_data")
+def fixture_bench_project_data(bench_options):
+    return project_data(bench_options["profiles"], bench_options["ecl_profiles"])
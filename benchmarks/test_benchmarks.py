@@ -0,0 +1,133 @@
+"""Benchmarks of the hot paths of the forward model, run with:
+
+    pytest benchmarks
+
+See benchmarks/conftest.py for options controlling the size of the
+synthetic summary case and project.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from click.testing import CliRunner
+
+from stea import (
+    SteaClient,
+    SteaInput,
+    SteaKeys,
+    SteaProject,
+    SteaRequest,
+    make_request,
+)
+from stea.fm_stea.fm_stea import main_entry_point
+from stea.testing import FakeSteaServer
+
+from .conftest import CONFIG_DATE, PROJECT_ID, PROJECT_VERSION
+
+CALCULATE_RESPONSE = {
+    SteaKeys.KEY_VALUES: [
+        {SteaKeys.TAX_MODE: SteaKeys.CORPORATE, SteaKeys.VALUES: {"NPV": 1, "IRR": 2}},
+        {SteaKeys.TAX_MODE: SteaKeys.PRETAX, SteaKeys.VALUES: {"NPV": 3, "IRR": 4}},
+    ]
+}
+
+
+@pytest.fixture(name="stea_input")
+def fixture_stea_input(bench_dir):
+    return SteaInput(bench_dir / "stea.yml")
+
+
+@pytest.fixture(name="project")
+def fixture_project(bench_project_data):
+    return SteaProject(bench_project_data)
+
+
+def test_load_stea_input(benchmark, bench_dir):
+    benchmark(SteaInput, bench_dir / "stea.yml")
+
+
+def test_project(benchmark, bench_project_data):
+    benchmark(SteaProject, bench_project_data)
+
+
+def test_make_request(benchmark, stea_input, project):
+    benchmark(make_request, stea_input, project)
+
+
+def test_add_ecl_profile(benchmark, stea_input, project):
+    def add_ecl_profile():
+        request = SteaRequest(stea_input, project)
+        request.add_ecl_profile("profile-0", "FOPT")
+
+    benchmark(add_ecl_profile)
+
+
+def test_add_ecl_profile_cropped(benchmark, stea_input, project):
+    def add_ecl_profile():
+        request = SteaRequest(stea_input, project)
+        start_date = stea_input.ecl_case.start_date.replace(month=7)
+        request.add_ecl_profile("profile-0", "FOPT", start_date=start_date)
+
+    benchmark(add_ecl_profile)
+
+
+def test_request_json(benchmark, stea_input, project):
+    request = make_request(stea_input, project)
+    benchmark(json.dumps, request.data())
+
+
+def test_main_entry_point(benchmark, bench_dir, bench_project_data, httpserver):
+    httpserver.expect_request(
+        f"/api/v1/Alternative/{PROJECT_ID}/{PROJECT_VERSION}/summary",
+        query_string=f"ConfigurationDate={CONFIG_DATE:%Y-%m-%dT%H:%M:%S}",
+    ).respond_with_json(bench_project_data)
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_json(
+        CALCULATE_RESPONSE
+    )
+    config = bench_dir / "stea_server.yml"
+    config.write_text(
+        (bench_dir / "stea.yml").read_text(encoding="utf-8")
+        + f"stea_server: {httpserver.url_for('').rstrip('/')}\n",
+        encoding="utf-8",
+    )
+    response_file = bench_dir / "stea_response.json"
+    runner = CliRunner()
+
+    def run():
+        result = runner.invoke(
+            main_entry_point, ["-c", str(config), "-r", str(response_file)]
+        )
+        assert result.exit_code == 0, result.output
+
+    with runner.isolated_filesystem(temp_dir=bench_dir):
+        benchmark(run)
+
+
+@pytest.mark.parametrize("concurrency", [1, 10])
+def test_concurrent_calculations(benchmark, stea_input, project, concurrency):
+    """Throughput of distinct calculations against a server taking 10 ms
+    per request."""
+    data = make_request(stea_input, project).data()
+    requests = []
+    for index in range(50):
+        request = SteaRequest(stea_input, project)
+        request.request_data = {**data, SteaKeys.RESULTS: ["NPV", f"R{index}"]}
+        requests.append(request)
+
+    with FakeSteaServer(project_data(project), latency=0.01) as server:
+        client = SteaClient(server.url, pool_size=concurrency)
+
+        def calculate_all():
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(client.calculate, requests))
+
+        benchmark(calculate_all)
+
+
+def project_data(project):
+    return {
+        SteaKeys.PROJECT_ID: project.project_id,
+        SteaKeys.PROJECT_VERSION: project.project_version,
+        SteaKeys.PROFILES: list(project.profiles.values()),
+    }
@@ -1,16 +1,51 @@
+import importlib
+from typing import TYPE_CHECKING
+
 try:  # noqa: RUF067
     from .version import version as __version__
 except ImportError:
     __version__ = "0.0.0"
 
 from .calculate import calculate as calculate
+from .calculate import calculate_from_config as calculate_from_config
+from .calculate import calculate_many as calculate_many
 from .make_request import make_request as make_request
-from .stea_client import SteaClient as SteaClient
-from .stea_config import SteaConfig  # noqa: F401
-from .stea_input import SteaInput as SteaInput
 from .stea_keys import SteaInputKeys, SteaKeys  # noqa: F401
 from .stea_project import SteaProject as SteaProject
-from .stea_request import SteaRequest as SteaRequest
 from .stea_result import SteaResult as SteaResult
 
-__all__ = ["calculate", "make_request"]
+if TYPE_CHECKING:
+    from .stea_async_client import AsyncSteaClient as AsyncSteaClient
+    from .stea_client import SteaClient as SteaClient
+    from .stea_config import SteaConfig as SteaConfig
+    from .stea_input import SteaInput as SteaInput
+    from .stea_request import SteaRequest as SteaRequest
+
+# The classes depending on resdata, requests, httpx, pydantic and numpy are
+# imported on first use, so that e.g. "fmu_steaclient --help" does not pay
+# for importing all of them. The calculate and make_request modules, which
+# share names with the functions exported here, must be imported eagerly;
+# they only import their heavy dependencies when called.
+_LAZY_ATTRIBUTES = {  # noqa: RUF067
+    "AsyncSteaClient": ".stea_async_client",
+    "SteaClient": ".stea_client",
+    "SteaConfig": ".stea_config",
+    "SteaInput": ".stea_input",
+    "SteaRequest": ".stea_request",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
+
+
+__all__ = ["calculate", "calculate_from_config", "calculate_many", "make_request"]
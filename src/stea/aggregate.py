@@ -0,0 +1,71 @@
+import json
+import re
+from pathlib import Path
+
+REALIZATION_PATTERN = re.compile(r"realization-(\d+)")
+
+
+def load_records(paths):
+    """Merge the record files written for each realization, see
+    SteaResult.records, into one pair of tables. Each row is tagged with
+    the path of its record file, and the realization number when the path
+    contains a realization-<number> directory."""
+    tables = {
+        "values": {"source": [], "realization": []},
+        "profiles": {"source": [], "realization": []},
+    }
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as fin:
+            records = json.load(fin)
+        match = REALIZATION_PATTERN.search(str(path))
+        realization = int(match.group(1)) if match else None
+        for name, table in tables.items():
+            columns = records[name]
+            num_rows = len(next(iter(columns.values()), []))
+            table["source"].extend([str(path)] * num_rows)
+            table["realization"].extend([realization] * num_rows)
+            for column, values in columns.items():
+                table.setdefault(column, []).extend(values)
+    return tables
+
+
+def write_parquet(tables, directory):
+    """Write the tables from load_records as <name>.parquet files in
+    directory, with the column types fixed so that the files of different
+    ensembles can be read as one dataset. Requires pyarrow."""
+    # pylint: disable=import-outside-toplevel
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+    except ImportError as err:
+        msg = (
+            "Writing parquet files requires pyarrow, "
+            "install with: pip install fmu-steaclient[parquet]"
+        )
+        raise ImportError(msg) from err
+
+    schemas = {
+        "values": pa.schema(
+            [
+                ("source", pa.string()),
+                ("realization", pa.int64()),
+                ("tax_mode", pa.string()),
+                ("key", pa.string()),
+                ("value", pa.float64()),
+            ]
+        ),
+        "profiles": pa.schema(
+            [
+                ("source", pa.string()),
+                ("realization", pa.int64()),
+                ("profile_id", pa.string()),
+                ("year", pa.int32()),
+                ("value", pa.float64()),
+            ]
+        ),
+    }
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, schema in schemas.items():
+        columns = {field.name: tables[name].get(field.name, []) for field in schema}
+        pq.write_table(pa.table(columns, schema=schema), directory / f"{name}.parquet")
@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from .make_request import make_request
+from .stea_client import SteaClient
+from .stea_input import SteaInput
+from .stea_result import SteaResult
+
+
+class _RequestData:
+    """A request built in a worker process. Only the payload is sent back to
+    the main process, the SteaRequest itself holds the loaded summary case."""
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, data):
+        self._data = data
+
+    def data(self):
+        return self._data
+
+
+def _build_request_data(config, ecl_case, project, runpath):
+    if config.production_cache:
+        # Each case has a production cache of its own in its runpath, rather
+        # than all of them taking turns overwriting one file in the cwd.
+        config = config.model_copy(
+            update={
+                "production_cache": str(
+                    Path(ecl_case).parent / runpath / config.production_cache
+                )
+            }
+        )
+    stea_input = SteaInput.from_config(config, ecl_case)
+    return make_request(stea_input, project).data()
+
+
+def calculate_batch(
+    config,
+    ecl_cases,
+    jobs=None,
+    max_concurrency=None,
+    *,
+    refresh=False,
+    runpath=".",
+):
+    """Run the calculation for each of the ecl cases in one process.
+
+    The project is fetched once and shared by all cases, the requests are
+    built in a pool of jobs worker processes, and posted to the server with
+    at most max_concurrency requests in flight. Yields (ecl_case, result)
+    pairs as the calculations complete; result is the exception raised if
+    the calculation for that case failed. With refresh, results cached for
+    identical requests are not used. A relative production-cache file is
+    kept in the runpath of each case, relative to the directory of the case.
+    """
+    max_concurrency = max_concurrency or config.pool_size
+    config = config.model_copy(
+        update={"ecl_case": None, "pool_size": max(config.pool_size, max_concurrency)}
+    )
+    stea_input = SteaInput.from_config(config)
+    client = SteaClient.from_config(config)
+    project = client.get_project(
+        config.project_id, config.project_version, config.config_date
+    )
+
+    with (
+        ProcessPoolExecutor(max_workers=jobs) as builders,
+        ThreadPoolExecutor(max_workers=max_concurrency) as posters,
+    ):
+        builds = {
+            builders.submit(
+                _build_request_data, config, ecl_case, project, runpath
+            ): ecl_case
+            for ecl_case in ecl_cases
+        }
+        posts = {}
+        for build in as_completed(builds):
+            ecl_case = builds[build]
+            try:
+                request = _RequestData(build.result())
+            except Exception as err:  # noqa: BLE001
+                yield ecl_case, err
+                continue
+            post = posters.submit(client.calculate, request, refresh=refresh)
+            posts[post] = (ecl_case, request)
+
+        for post in as_completed(posts):
+            ecl_case, request = posts[post]
+            try:
+                result = SteaResult(
+                    post.result(), stea_input, project=project, request=request
+                )
+            except Exception as err:  # noqa: BLE001
+                yield ecl_case, err
+                continue
+            yield ecl_case, result
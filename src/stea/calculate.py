@@ -1,14 +1,124 @@
-from .make_request import make_request
-from .stea_client import SteaClient
-from .stea_config import SteaConfig  # noqa: F401
+from .make_request import check_profiles, make_request
 from .stea_keys import SteaInputKeys, SteaKeys  # noqa: F401
 from .stea_result import SteaResult
 
+# pylint: disable=import-outside-toplevel
+# The clients, and asyncio, are imported when used to keep "import stea"
+# cheap, see __init__.py.
 
-def calculate(stea_input):
-    client = SteaClient(stea_input.stea_server)
-    project = client.get_project(
-        stea_input.project_id, stea_input.project_version, stea_input.config_date
-    )
-    request = make_request(stea_input, project)
-    return SteaResult(client.calculate(request), stea_input)
+
+def calculate(stea_input, timings=None, *, refresh=False):
+    """Calculate the stea_input, recording the time of each phase and the
+    HTTP requests in timings, if given. With refresh, a result cached for
+    the same request is not used, see SteaClient.calculate."""
+    from .stea_client import SteaClient  # noqa: PLC0415
+    from .stea_timings import PROJECT_GET, Timings  # noqa: PLC0415
+
+    if timings is None:
+        timings = Timings()
+    client = SteaClient.from_config(stea_input.config, timings=timings)
+    with timings.phase(PROJECT_GET):
+        project = client.get_project(
+            stea_input.project_id, stea_input.project_version, stea_input.config_date
+        )
+    return _calculate(client, stea_input, project, timings, refresh=refresh)
+
+
+def calculate_from_config(config, timings=None, *, refresh=False):
+    """Calculate the ecl case of config like calculate(), but fetch the
+    project in the background while the case is loaded, and check that the
+    project has all the profiles in config before extracting any production.
+    The project_get and summary_load phases of the timings overlap."""
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    from .stea_client import SteaClient  # noqa: PLC0415
+    from .stea_input import SteaInput  # noqa: PLC0415
+    from .stea_timings import PROJECT_GET, SUMMARY_LOAD, Timings  # noqa: PLC0415
+
+    if timings is None:
+        timings = Timings()
+    client = SteaClient.from_config(config, timings=timings)
+
+    def get_project():
+        with timings.phase(PROJECT_GET):
+            return client.get_project(
+                config.project_id, config.project_version, config.config_date
+            )
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        fetch = executor.submit(get_project)
+        with timings.phase(SUMMARY_LOAD):
+            stea_input = SteaInput.from_config(config)
+        project = fetch.result()
+    finally:
+        # Failing to load the case raises without waiting for the project.
+        # The fetch cannot be interrupted though: its thread is joined at
+        # exit, so the process still ends once the fetch has completed or
+        # timed out.
+        executor.shutdown(wait=False)
+    check_profiles(config, project)
+    return _calculate(client, stea_input, project, timings, refresh=refresh)
+
+
+def _calculate(client, stea_input, project, timings, *, refresh):
+    from .stea_timings import CALCULATE_POST, PROFILE_EXTRACTION  # noqa: PLC0415
+
+    with timings.phase(PROFILE_EXTRACTION):
+        request = make_request(stea_input, project)
+    with timings.phase(CALCULATE_POST):
+        data = client.calculate(request, refresh=refresh)
+    return SteaResult(data, stea_input, project=project, request=request)
+
+
+async def calculate_many(stea_inputs, max_concurrency=None):
+    """Asynchronous counterpart to calculate() for a list of inputs, with at
+    most max_concurrency calculations in flight per server at any time. The
+    results are returned in the same order as the inputs. Inputs sharing
+    the same project only fetch it once."""
+    import asyncio  # noqa: PLC0415
+
+    from .stea_async_client import AsyncSteaClient  # noqa: PLC0415
+
+    clients = {}
+    projects = {}
+
+    async def calculate_one(stea_input):
+        if stea_input.stea_server not in clients:
+            clients[stea_input.stea_server] = AsyncSteaClient.from_config(
+                stea_input.config, max_concurrency=max_concurrency
+            )
+        client = clients[stea_input.stea_server]
+
+        project_key = (
+            stea_input.stea_server,
+            stea_input.project_id,
+            stea_input.project_version,
+            stea_input.config_date,
+        )
+        if project_key not in projects:
+            projects[project_key] = asyncio.ensure_future(
+                client.get_project(*project_key[1:])
+            )
+        project = await projects[project_key]
+
+        request = make_request(stea_input, project)
+        return SteaResult(
+            await client.calculate(request),
+            stea_input,
+            project=project,
+            request=request,
+        )
+
+    tasks = [asyncio.ensure_future(calculate_one(item)) for item in stea_inputs]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # When one input fails, the calculations and project fetches still
+        # in flight must be done with the clients before they are closed.
+        pending = [*tasks, *projects.values()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for client in clients.values():
+            await client.aclose()
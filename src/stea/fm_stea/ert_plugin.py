@@ -0,0 +1,44 @@
+import shutil
+
+from ert import (
+    ForwardModelStepDocumentation,
+    ForwardModelStepPlugin,
+)
+from ert import (
+    plugin as ert_plugin,
+)
+
+from .fm_stea import main_entry_point
+
+
+class FmuSteaclient(ForwardModelStepPlugin):
+    def __init__(self) -> None:
+        super().__init__(
+            name="STEA",
+            command=[
+                shutil.which("fmu_steaclient") or "fmu_steaclient",
+                "--config",
+                "<CONFIG>",
+                "--response_file",
+                "<RESPONSE_FILE>",
+                "--ecl_case",
+                "<ECL_CASE>",
+            ],
+            default_mapping={
+                "<RESPONSE_FILE>": "stea_response.json",
+                "<ECL_CASE>": "__NONE__",
+            },
+        )
+
+    @staticmethod
+    def documentation() -> ForwardModelStepDocumentation:
+        return ForwardModelStepDocumentation(
+            description=str(main_entry_point.__doc__),
+            category="modelling.financial",
+            examples="",
+        )
+
+
+@ert_plugin(name="stea")
+def installable_forward_model_steps() -> list[type[ForwardModelStepPlugin]]:
+    return [FmuSteaclient]
@@ -1,20 +1,33 @@
+import glob
+import gzip
 import json
-import shutil
+import sys
 from pathlib import Path
 
 import click
-from ert import (
-    ForwardModelStepDocumentation,
-    ForwardModelStepPlugin,
-)
-from ert import (
-    plugin as ert_plugin,
-)
 
 import stea
 
 
-@click.command()
+class _DefaultCommandGroup(click.Group):
+    """Runs the default command when the first argument is not the name of a
+    command, so that plain "fmu_steaclient --config ..." keeps working."""
+
+    default_command = "run"
+
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] != "--help"):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultCommandGroup)
+def cli():
+    """Client for the STEA economic analysis tool. Runs a single
+    calculation unless another command is given."""
+
+
+@cli.command("run")
 @click.option(
     "--config",
     "-c",
@@ -35,7 +48,12 @@ import stea
     help="STEA response, json format",
     type=click.Path(exists=False),
 )
-def main_entry_point(config, ecl_case, response_file):
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Post the calculations even if results are cached, see result-cache",
+)
+def main_entry_point(config, ecl_case, response_file, refresh):
     """STEA is a powerful economic analysis tool used for complex economic
     analysis and portfolio optimization. STEA helps you analyze single
     projects, large and small portfolios and complex decision trees.
@@ -47,66 +65,328 @@ def main_entry_point(config, ecl_case, response_file):
     See https://github.com/equinor/fmu-steaclient for documentation of the
     yaml config file.
     """
-    try:  # noqa: PLW0717
+    # pylint: disable=import-outside-toplevel
+    from stea import stea_timings  # noqa: PLC0415
+
+    timings = stea_timings.Timings()
+    try:
         if ecl_case == "__NONE__":  # This is because ert can't handle optionals
             ecl_case = None
-        stea_input = stea.SteaInput(config, ecl_case)
-        result = stea.calculate(stea_input)
-        for res, value in result.results(stea.SteaKeys.CORPORATE).items():
-            Path(f"{res}_0").write_text(f"{value}\n", encoding="utf-8")
-        profiles = _get_profiles(
-            stea_input.stea_server,
-            stea_input.project_id,
-            stea_input.project_version,
-            stea_input.config_date,
-        )
-        full_response = _build_full_response(
-            result.data[stea.SteaKeys.KEY_VALUES], profiles
+        _run(config, ecl_case, response_file, timings, refresh=refresh)
+    except Exception as err:
+        raise click.exceptions.ClickException(str(err)) from err
+    finally:
+        # Also written when the calculation fails, to show where it failed.
+        _write_timings(timings, response_file)
+
+
+def _write_timings(timings, response_file):
+    """Write the timings next to the response file; failing to do so is only
+    reported, so that it does not hide the error of a failed calculation."""
+    # pylint: disable=import-outside-toplevel
+    from stea import stea_timings  # noqa: PLC0415
+
+    path = Path(response_file).with_name(stea_timings.TIMINGS_FILE)
+    try:
+        timings.write(path)
+    except OSError as err:
+        sys.stderr.write(f"Could not write the timings to {path}: {err}\n")
+
+
+def _run(config, ecl_case, response_file, timings, *, refresh):
+    # pylint: disable=import-outside-toplevel
+    from stea import stea_timings  # noqa: PLC0415
+    from stea.stea_input import load_config  # noqa: PLC0415
+
+    with timings.phase(stea_timings.CONFIG):
+        stea_config = load_config(config, ecl_case)
+    result = stea.calculate_from_config(stea_config, timings=timings, refresh=refresh)
+    with timings.phase(stea_timings.WRITE_RESPONSE):
+        _write_result(result, Path(), response_file)
+
+
+@cli.command("compile")
+@click.option(
+    "--config",
+    "-c",
+    help="STEA config file, yaml format required",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--output",
+    "-o",
+    default="stea_plan.json",
+    show_default=True,
+    help="The plan file to write",
+    type=click.Path(exists=False),
+)
+def compile_config(config, output):
+    """Compile the config into a plan file for the run-plan command. The
+    config is validated and the project is fetched once, and the profiles
+    are resolved against the project, so that the realizations of an
+    ensemble only extract the production and post the calculation."""
+    # pylint: disable=import-outside-toplevel
+    from stea.plan import compile_plan, write_plan  # noqa: PLC0415
+    from stea.stea_input import load_config  # noqa: PLC0415
+
+    try:
+        stea_config = load_config(config)
+        project = stea.SteaClient.from_config(stea_config).get_project(
+            stea_config.project_id,
+            stea_config.project_version,
+            stea_config.config_date,
         )
-        with Path(response_file).open("w", encoding="utf-8") as fout:
-            json.dump(full_response, fout, indent=4)
+        write_plan(compile_plan(stea_config, project), output)
     except Exception as err:
         raise click.exceptions.ClickException(str(err)) from err
 
 
-def _get_profiles(server, project_id, project_version, config_date):
-    client = stea.SteaClient(server)
-    project = client.get_project(project_id, project_version, config_date)
-    return project.profiles
+@cli.command("run-plan")
+@click.option(
+    "--plan",
+    "-p",
+    help="Plan file written by the compile command",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--ecl_case",
+    "-e",
+    default=None,
+    help="Case name, will overwrite the value in the config if provided",
+)
+@click.option(
+    "--response_file",
+    "-r",
+    default="stea_response.json",
+    help="STEA response, json format",
+    type=click.Path(exists=False),
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Post the calculations even if results are cached, see result-cache",
+)
+def run_plan(plan, ecl_case, response_file, refresh):
+    """Calculate a single case like the run command, with a plan compiled
+    from the config by the compile command."""
+    # pylint: disable=import-outside-toplevel
+    from stea import stea_timings  # noqa: PLC0415
+
+    timings = stea_timings.Timings()
+    try:
+        if ecl_case == "__NONE__":
+            ecl_case = None
+        _run_plan(plan, ecl_case, response_file, timings, refresh=refresh)
+    except Exception as err:
+        raise click.exceptions.ClickException(str(err)) from err
+    finally:
+        _write_timings(timings, response_file)
+
+
+def _run_plan(plan, ecl_case, response_file, timings, *, refresh):
+    # pylint: disable=import-outside-toplevel
+    from stea import plan as stea_plan  # noqa: PLC0415
+    from stea import stea_timings  # noqa: PLC0415
+
+    with timings.phase(stea_timings.CONFIG):
+        compiled = stea_plan.load_plan(plan)
+    result = stea_plan.run_plan(compiled, ecl_case, timings=timings, refresh=refresh)
+    with timings.phase(stea_timings.WRITE_RESPONSE):
+        _write_result(result, Path(), response_file)
+
+
+@cli.command("batch")
+@click.option(
+    "--config",
+    "-c",
+    help="STEA config file, yaml format required",
+    type=click.Path(exists=True),
+    required=True,
+)
+@click.option(
+    "--cases",
+    required=True,
+    help=(
+        "Glob pattern matching the summary cases to calculate, "
+        "e.g. 'realization-*/iter-0/eclipse/model/CASE'"
+    ),
+)
+@click.option(
+    "--runpath",
+    default="../..",
+    show_default=True,
+    help="Where to write the results, relative to the directory of each case",
+)
+@click.option(
+    "--response_file",
+    "-r",
+    default="stea_response.json",
+    show_default=True,
+    help="STEA response, json format",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=int,
+    default=None,
+    help="Number of processes building requests, defaults to the number of CPUs",
+)
+@click.option(
+    "--max-concurrency",
+    type=int,
+    default=None,
+    help="Maximum number of requests in flight, defaults to the pool-size config",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Post the calculations even if results are cached, see result-cache",
+)
+def batch(config, cases, runpath, response_file, jobs, max_concurrency, refresh):
+    """Calculate many summary cases, e.g. all realizations in an ensemble,
+    from one process. The config is loaded and the project is fetched once,
+    and the result files are written to the runpath of each case, like the
+    forward model does for a single case."""
+    # pylint: disable=import-outside-toplevel
+    from stea.batch import calculate_batch  # noqa: PLC0415
+    from stea.stea_input import load_config  # noqa: PLC0415
+
+    # Unlike Path.glob, glob.glob takes absolute patterns; the summary files
+    # may also be named in lower case
+    ecl_cases = sorted(
+        {
+            path.rsplit(".", 1)[0]
+            for path in glob.glob(f"{cases}.*")  # noqa: PTH207
+            if path.upper().endswith(".SMSPEC")
+        }
+    )
+    if not ecl_cases:
+        msg = f"No summary cases matching: {cases}"
+        raise click.exceptions.ClickException(msg)
+
+    try:  # noqa: PLW0717
+        config = load_config(config)
+        failed = 0
+        for ecl_case, result in calculate_batch(
+            config,
+            ecl_cases,
+            jobs=jobs,
+            max_concurrency=max_concurrency,
+            refresh=refresh,
+            runpath=runpath,
+        ):
+            if isinstance(result, Exception):
+                failed += 1
+                sys.stderr.write(f"{ecl_case}: {result}\n")
+            else:
+                _write_result(result, Path(ecl_case).parent / runpath, response_file)
+    except Exception as err:
+        raise click.exceptions.ClickException(str(err)) from err
+
+    if failed:
+        msg = f"Calculation failed for {failed} of {len(ecl_cases)} cases"
+        raise click.exceptions.ClickException(msg)
+
+
+@cli.command("aggregate")
+@click.option(
+    "--records",
+    required=True,
+    help=(
+        "Glob pattern matching the record files of the realizations, see the "
+        "record-file config, e.g. 'realization-*/iter-0/stea_record.json'"
+    ),
+)
+@click.option(
+    "--output",
+    "-o",
+    default="stea_results",
+    show_default=True,
+    help="Directory to write values.parquet and profiles.parquet to",
+)
+def aggregate(records, output):
+    """Merge the result records of an ensemble into one table of the values
+    and one of the adjusted profiles, written as parquet files with a
+    source and realization column. Requires pyarrow."""
+    # pylint: disable=import-outside-toplevel
+    from stea.aggregate import load_records, write_parquet  # noqa: PLC0415
+
+    paths = sorted(Path(path) for path in glob.glob(records))  # noqa: PTH207
+    if not paths:
+        msg = f"No record files matching: {records}"
+        raise click.exceptions.ClickException(msg)
+    try:
+        write_parquet(load_records(paths), output)
+    except Exception as err:
+        raise click.exceptions.ClickException(str(err)) from err
+
+
+def _write_result(result, runpath, response_file):
+    for res, value in result.results(stea.SteaKeys.CORPORATE).items():
+        (runpath / f"{res}_0").write_text(f"{value}\n", encoding="utf-8")
+    config = result.stea_input.config
+    full_response = _build_full_response(
+        result.data[stea.SteaKeys.KEY_VALUES],
+        _response_profiles(result, config.response_profiles),
+    )
+    if config.profile_catalogue:
+        full_response["profile_catalogue"] = str(
+            _write_profile_catalogue(result.project, config)
+        )
+    _dump_response(
+        full_response,
+        runpath / response_file,
+        compact=config.response_compact,
+        compress=config.response_gzip,
+    )
+    if config.record_file:
+        with (runpath / config.record_file).open("w", encoding="utf-8") as fout:
+            json.dump(result.records(), fout, separators=(",", ":"))
 
 
 def _build_full_response(result, profiles):
     return {"response": result, "profiles": profiles}
 
 
-class FmuSteaclient(ForwardModelStepPlugin):
-    def __init__(self) -> None:
-        super().__init__(
-            name="STEA",
-            command=[
-                shutil.which("fmu_steaclient") or "fmu_steaclient",
-                "--config",
-                "<CONFIG>",
-                "--response_file",
-                "<RESPONSE_FILE>",
-                "--ecl_case",
-                "<ECL_CASE>",
-            ],
-            default_mapping={
-                "<RESPONSE_FILE>": "stea_response.json",
-                "<ECL_CASE>": "__NONE__",
-            },
-        )
+def _response_profiles(result, selection):
+    if selection == "none":
+        return {}
+    if selection == "adjusted":
+        adjustments = result.request.data()[stea.SteaKeys.ADJUSTMENTS]
+        return {
+            profile[stea.SteaKeys.PROFILE_ID]: result.project.get_profile(
+                profile[stea.SteaKeys.PROFILE_ID]
+            )
+            for profile in adjustments[stea.SteaKeys.PROFILES]
+        }
+    return result.project.profiles
+
+
+def _dump_response(response, path, *, compact, compress):
+    kwargs = {"separators": (",", ":")} if compact else {"indent": 4}
+    if compress:
+        with gzip.open(f"{path}.gz", "wt", encoding="utf-8") as fout:
+            json.dump(response, fout, **kwargs)
+    else:
+        with path.open("w", encoding="utf-8") as fout:
+            json.dump(response, fout, **kwargs)
 
-    @staticmethod
-    def documentation() -> ForwardModelStepDocumentation:
-        return ForwardModelStepDocumentation(
-            description=str(main_entry_point.__doc__),
-            category="modelling.financial",
-            examples="",
-        )
 
+def _write_profile_catalogue(project, config):
+    """Write the profiles of the project to the profile-catalogue directory,
+    unless they are already there; all realizations calculated with the same
+    project share the file, which is returned."""
+    directory = Path(config.profile_catalogue).resolve()
+    path = directory / (
+        f"profiles_{project.project_id}_{project.project_version}_"
+        f"{config.config_date:%Y%m%dT%H%M%S}.json"
+    )
+    if not path.exists():
+        # pylint: disable=import-outside-toplevel
+        from stea.stea_cache import write_json  # noqa: PLC0415
 
-@ert_plugin(name="stea")
-def installable_forward_model_steps() -> list[type[ForwardModelStepPlugin]]:
-    return [FmuSteaclient]
+        directory.mkdir(parents=True, exist_ok=True)
+        write_json(path, project.profiles, indent=4)
+    return path
@@ -1,52 +1,73 @@
-from .stea_config import SteaConfig  # noqa: F401
-from .stea_input import SteaInput
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from .stea_keys import SteaInputKeys, SteaKeys  # noqa: F401
-from .stea_project import SteaProject
-from .stea_request import SteaRequest
+
+if TYPE_CHECKING:
+    from .stea_config import SteaConfig
+    from .stea_input import SteaInput
+    from .stea_project import SteaProject
+    from .stea_request import SteaRequest
+
+
+def check_profiles(config: SteaConfig, project: SteaProject):
+    """Raise a KeyError if any of the profiles in config matches neither the
+    id nor the description of a profile in the project. make_request skips
+    such profiles; checking first lets a misspelled id fail before any
+    production is extracted from the ecl case."""
+    missing = [
+        profile_id
+        for profile_id in [*config.ecl_profiles, *config.profiles]
+        if not project.find_profiles(profile_id)
+    ]
+    if missing:
+        msg = (
+            f"No profiles with id or description {', '.join(missing)} in project "
+            f"{project.project_id} version {project.project_version}"
+        )
+        raise KeyError(msg)
+
+
+def resolve_profiles(config: SteaConfig, project: SteaProject):
+    """The profiles of config with their ids and descriptions resolved to the
+    ids of the matching profiles in the project: a list of EclProfiles, and
+    a list of (profile_id, start_year, data) for the explicit profiles."""
+    # pylint: disable=import-outside-toplevel
+    from .stea_request import EclProfile  # noqa: PLC0415
+
+    ecl_profiles = []
+    for profile_id, profile_data in config.ecl_profiles.items():
+        glob_mult = profile_data.glob_mult
+        ecl_profiles.extend(
+            EclProfile(
+                pid,
+                profile_data.ecl_key,
+                start_date=profile_data.start_date,
+                end_year=profile_data.end_year,
+                multiplier=profile_data.mult or [1],
+                global_multiplier=1.0 if glob_mult is None else glob_mult,
+            )
+            for pid in project.find_profiles(profile_id)
+        )
+
+    profiles = [
+        (pid, profile_data.start_year, profile_data.data)
+        for profile_id, profile_data in config.profiles.items()
+        for pid in project.find_profiles(profile_id)
+    ]
+    return ecl_profiles, profiles
 
 
 def make_request(stea_input: SteaInput, project: SteaProject) -> SteaRequest:
-    request = SteaRequest(stea_input, project)
+    # Imported when used to keep "import stea" cheap, see __init__.py.
+    # pylint: disable=import-outside-toplevel
+    from .stea_request import SteaRequest  # noqa: PLC0415
 
-    for profile_id, profile_data in stea_input.ecl_profiles.items():
-        if profile_id not in project.profiles:
-            profile_list = [
-                k
-                for k, v in project.profiles.items()
-                if v.get(SteaInputKeys.PROFILE_KEY) == profile_id
-            ]
-        else:
-            profile_list = [profile_id]
-        if len(profile_list) > 0:
-            ecl_key = profile_data.ecl_key
-            mult = profile_data.mult
-            glob_mult = profile_data.glob_mult
-            for pid in profile_list:
-                if mult is None:
-                    mult = [1]
-                if glob_mult is None:
-                    glob_mult = 1.0
-                request.add_ecl_profile(
-                    pid,
-                    ecl_key,
-                    start_date=profile_data.start_date,
-                    end_year=profile_data.end_year,
-                    multiplier=mult,
-                    global_multiplier=glob_mult,
-                )
-
-    for profile_id, profile_data in stea_input.profiles.items():
-        if profile_id not in project.profiles:
-            profile_list = [
-                k
-                for k, v in project.profiles.items()
-                if v.get(SteaInputKeys.PROFILE_KEY) == profile_id
-            ]
-        else:
-            profile_list = [profile_id]
-        if len(profile_list) > 0:
-            start_year = profile_data.start_year
-            data = profile_data.data
-            for pid in profile_list:
-                request.add_profile(pid, start_year, data)
+    ecl_profiles, profiles = resolve_profiles(stea_input, project)
+    request = SteaRequest(stea_input, project)
+    if ecl_profiles:
+        request.add_ecl_profiles(ecl_profiles)
+    for profile in profiles:
+        request.add_profile(*profile)
     return request
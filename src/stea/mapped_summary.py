@@ -0,0 +1,225 @@
+"""A reader of the unified binary summary files of a simulation, the SMSPEC
+header and the UNSMRY data, for the few keys used for the ecl-profiles.
+
+The UNSMRY file is memory mapped, and only the positions of its PARAMS
+records are found up front, by stepping from keyword header to keyword
+header. The values of a key are then read through a big endian float view
+of the whole file, indexed at the position of the key in each record, so
+that only the pages holding those values are read from disk.
+"""
+
+import datetime
+import mmap
+import struct
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+# Keyword headers are a Fortran record of the name, the number of elements
+# and the type; the elements follow in records of up to BLOCK_SIZE elements.
+HEADER = struct.Struct(">i8si4si")
+MARKER_SIZE = 4
+BLOCK_SIZE = 1000
+CHAR_BLOCK_SIZE = 105
+ELEMENT_SIZE = {b"INTE": 4, b"REAL": 4, b"LOGI": 4, b"DOUB": 8, b"CHAR": 8, b"MESS": 0}
+
+# Names of the wells and groups of summary variables not tied to any
+DUMMY_WELL = ":+:+:+:+"
+
+SUMMARY_SUFFIXES = {".DATA", ".SMSPEC", ".UNSMRY"}
+
+
+def _element_size(data_type):
+    if data_type.startswith(b"C0"):
+        return int(data_type[1:])
+    return ELEMENT_SIZE[data_type]
+
+
+def _block_size(data_type):
+    if data_type == b"CHAR" or data_type.startswith(b"C0"):
+        return CHAR_BLOCK_SIZE
+    return BLOCK_SIZE
+
+
+def _data_size(data_type, count):
+    """Size in bytes of the records holding count elements of data_type."""
+    num_blocks = -(-count // _block_size(data_type))
+    return count * _element_size(data_type) + 2 * MARKER_SIZE * num_blocks
+
+
+def _keywords(buffer):
+    """Yield the name, type, number of elements and the offset of the data
+    of each keyword in buffer, without reading the data."""
+    offset = 0
+    while offset < len(buffer):
+        _, name, count, data_type, _ = HEADER.unpack_from(buffer, offset)
+        offset += HEADER.size
+        yield name.decode("ascii").strip(), data_type, count, offset
+        offset += _data_size(data_type, count)
+
+
+def _read(buffer, data_type, count, offset):
+    """The elements of a keyword, as a list of strings for character data
+    and a numpy array otherwise."""
+    size = _element_size(data_type)
+    block_size = _block_size(data_type)
+    data = bytearray()
+    for start in range(0, count, block_size):
+        length = min(block_size, count - start) * size
+        data += buffer[offset + MARKER_SIZE : offset + MARKER_SIZE + length]
+        offset += length + 2 * MARKER_SIZE
+    if data_type == b"CHAR" or data_type.startswith(b"C0"):
+        return [
+            data[index : index + size].decode("ascii").strip()
+            for index in range(0, len(data), size)
+        ]
+    dtype = {b"INTE": ">i4", b"REAL": ">f4", b"DOUB": ">f8", b"LOGI": ">i4"}
+    return np.frombuffer(bytes(data), dtype=dtype[data_type])
+
+
+def _summary_keys(keyword, well, num, dims):
+    """The keys of a summary variable, as named by resdata."""
+    well = "" if well == DUMMY_WELL else well
+    if keyword[0] in "AR":
+        return [f"{keyword}:{num}"]
+    if keyword[0] == "B":
+        return [f"{keyword}:{_ijk(num, dims)}", f"{keyword}:{num}"]
+    if keyword[0] == "C" and well:
+        return [f"{keyword}:{well}:{_ijk(num, dims)}", f"{keyword}:{well}:{num}"]
+    if keyword[0] == "S" and well:
+        return [f"{keyword}:{well}:{num}"]
+    if keyword[0] in "WGN" and well:
+        return [f"{keyword}:{well}"]
+    return [keyword]
+
+
+def _ijk(num, dims):
+    """The i,j,k of the cell with the 1-based global index num."""
+    nx, ny = (max(dim, 1) for dim in dims[:2])
+    index = num - 1
+    return f"{index % nx + 1},{index // nx % ny + 1},{index // (nx * ny) + 1}"
+
+
+class MappedSummary:
+    """The subset of resdata.summary.Summary used to extract the profiles,
+    read directly from the unified binary SMSPEC and UNSMRY files.
+
+    Only the case itself is read; the history of a restarted case is not
+    loaded from the case it is restarted from. Values are interpolated
+    linearly in time, as for the total keys used for the profiles.
+    """
+
+    def __init__(self, case):
+        path = Path(case)
+        if path.suffix.upper() in SUMMARY_SUFFIXES:
+            path = path.with_suffix("")
+        self.case = str(path)
+        self.base = path.name
+        self.abs_path = str(path.parent.resolve())
+        self._smspec = self._file(path, ".SMSPEC")
+        self._unsmry = self._file(path, ".UNSMRY")
+        self._values = {}
+        self._read_header()
+
+    @staticmethod
+    def _file(path, suffix):
+        for candidate in (suffix, suffix.lower()):
+            file_path = path.with_name(path.name + candidate)
+            if file_path.is_file():
+                return file_path
+        msg = f"No such summary file: {path.with_name(path.name + suffix)}"
+        raise FileNotFoundError(msg)
+
+    def _read_header(self):
+        buffer = self._smspec.read_bytes()
+        header = {
+            name: _read(buffer, data_type, count, offset)
+            for name, data_type, count, offset in _keywords(buffer)
+        }
+        # Day, month, year and optionally hour, minute and microseconds
+        day, month, year, hour, minute, microseconds = (
+            int(value) for value in [*header["STARTDAT"], 0, 0, 0][:6]
+        )
+        self.start_time = datetime.datetime(
+            year, month, day, hour, minute, *divmod(microseconds, 10**6)
+        )
+        self.start_date = self.start_time.date()
+        wells = header["NAMES"] if "NAMES" in header else header["WGNAMES"]
+        dims = header["DIMENS"][1:4]
+        self._columns = {}
+        self._units = {}
+        for column, keyword in enumerate(header["KEYWORDS"]):
+            for key in _summary_keys(
+                keyword, wells[column], int(header["NUMS"][column]), dims
+            ):
+                self._columns.setdefault(key, column)
+                self._units.setdefault(key, header["UNITS"][column])
+        if "TIME" not in self._columns:
+            msg = f"No TIME in the summary case: {self.case}"
+            raise ValueError(msg)
+
+    @cached_property
+    def _params(self):
+        """The UNSMRY file as big endian floats, and the index in it of the
+        first value of each PARAMS record."""
+        with self._unsmry.open("rb") as fin:
+            buffer = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = [
+            offset for name, _, _, offset in _keywords(buffer) if name == "PARAMS"
+        ]
+        floats = np.frombuffer(buffer, dtype=">f4", count=len(buffer) // 4)
+        return floats, (np.array(offsets, dtype=np.int64) + MARKER_SIZE) // 4
+
+    def _column(self, key):
+        if key not in self._values:
+            floats, first = self._params
+            column = self._columns[key]
+            # The values are split into records of BLOCK_SIZE values, each
+            # one preceded and followed by a marker the size of a float.
+            block, position = divmod(column, BLOCK_SIZE)
+            index = first + block * (BLOCK_SIZE + 2) + position
+            self._values[key] = floats[index].astype(np.float64)
+        return self._values[key]
+
+    @cached_property
+    def _days(self):
+        return self._column("TIME")
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def keys(self):
+        return sorted(self._columns)
+
+    def unit(self, key):
+        return self._units[key]
+
+    def _time(self, days):
+        # Like resdata, times are truncated to whole seconds
+        return self.start_time + datetime.timedelta(seconds=int(days * 86400))
+
+    def get_data_start_time(self):
+        return self._time(self._days[0])
+
+    def get_end_time(self):
+        return self._time(self._days[-1])
+
+    @property
+    def end_time(self):
+        return self.get_end_time()
+
+    @property
+    def end_date(self):
+        return self.end_time.date()
+
+    def last_value(self, key):
+        return float(self._column(key)[-1])
+
+    def get_interp(self, key, date):
+        """The value of key at date, interpolated between the time steps."""
+        if not self.get_data_start_time() <= date <= self.get_end_time():
+            msg = f"date:{date} is outside range of simulation data"
+            raise ValueError(msg)
+        days = (date - self.start_time) / datetime.timedelta(days=1)
+        return float(np.interp(days, self._days, self._column(key)))
@@ -0,0 +1,152 @@
+"""Request plans compiled once for an ensemble.
+
+A plan holds everything needed to calculate a summary case that does not
+differ between the realizations: the settings of the config, the project,
+the ecl-profiles and profiles resolved to the ids of the project profiles,
+and their unit conversions. Running a plan does not parse yaml, validate
+the config with pydantic, or fetch the project from the server; only the
+production is extracted from the case and the calculation posted.
+"""
+
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from .make_request import check_profiles, resolve_profiles
+from .stea_client import SteaClient
+from .stea_keys import SteaKeys
+from .stea_project import SteaProject
+from .stea_request import EclProfile, SteaRequest, profile_conversion
+from .stea_result import SteaResult
+from .stea_timings import (
+    CALCULATE_POST,
+    PROFILE_EXTRACTION,
+    SUMMARY_LOAD,
+    Timings,
+)
+from .summary_index import YearlyIndex, load_case
+
+# Increased whenever the layout of the plan changes; plans of another
+# version must be compiled again.
+PLAN_VERSION = 1
+
+
+def compile_plan(config, project):
+    """Compile the config, a SteaConfig, against the project."""
+    check_profiles(config, project)
+    ecl_profiles, profiles = resolve_profiles(config, project)
+
+    settings = config.model_dump(mode="json", exclude={"ecl_profiles", "profiles"})
+    settings["cache_ttl"] = config.cache_ttl.total_seconds()
+    return {
+        "version": PLAN_VERSION,
+        "config": settings,
+        "project": {
+            SteaKeys.PROJECT_ID: project.project_id,
+            SteaKeys.PROJECT_VERSION: project.project_version,
+            SteaKeys.PROFILES: list(project.profiles.values()),
+        },
+        "ecl_profiles": [
+            {
+                "profile_id": profile.profile_id,
+                "key": profile.key,
+                "start_date": (
+                    None
+                    if profile.start_date is None
+                    else profile.start_date.isoformat()
+                ),
+                "end_year": profile.end_year,
+                "multiplier": list(profile.multiplier),
+                "global_multiplier": profile.global_multiplier,
+            }
+            for profile in ecl_profiles
+        ],
+        "conversions": {
+            profile.profile_id: profile_conversion(project, profile.profile_id)
+            for profile in ecl_profiles
+        },
+        "profiles": [
+            {"profile_id": profile_id, "start_year": start_year, "data": data}
+            for profile_id, start_year, data in profiles
+        ],
+    }
+
+
+def write_plan(plan, path):
+    Path(path).write_text(json.dumps(plan, separators=(",", ":")), encoding="utf-8")
+
+
+def load_plan(path):
+    plan = json.loads(Path(path).read_text(encoding="utf-8"))
+    if plan.get("version") != PLAN_VERSION:
+        msg = (
+            f"Plan {path} has version {plan.get('version')}, this version of "
+            f"fmu-steaclient runs version {PLAN_VERSION}; compile it again"
+        )
+        raise ValueError(msg)
+    return plan
+
+
+class PlanInput:
+    """The counterpart of SteaInput for a plan: the settings of the config,
+    as attributes of config and of the input itself, and the loaded case."""
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, settings, ecl_case=None):
+        self.config = SimpleNamespace(**settings)
+        self.config.config_date = datetime.fromisoformat(settings["config_date"])
+        self.config.cache_ttl = timedelta(seconds=settings["cache_ttl"])
+        if ecl_case:
+            self.config.ecl_case = ecl_case
+        self.ecl_case = None
+        self.summary_index = None
+        if self.config.ecl_case is not None:
+            self.ecl_case = load_case(self.config.ecl_case, self.summary_reader)
+            self.summary_index = YearlyIndex(self.ecl_case)
+
+    def __getattr__(self, key):
+        return getattr(self.config, key)
+
+
+def plan_request(plan, plan_input, project):
+    """The request of the plan for the case of plan_input."""
+    request = SteaRequest(plan_input, project, conversions=plan["conversions"])
+    ecl_profiles = [
+        EclProfile(
+            profile["profile_id"],
+            profile["key"],
+            start_date=(
+                None
+                if profile["start_date"] is None
+                else date.fromisoformat(profile["start_date"])
+            ),
+            end_year=profile["end_year"],
+            multiplier=profile["multiplier"],
+            global_multiplier=profile["global_multiplier"],
+        )
+        for profile in plan["ecl_profiles"]
+    ]
+    if ecl_profiles:
+        request.add_ecl_profiles(ecl_profiles)
+    for profile in plan["profiles"]:
+        request.add_profile(
+            profile["profile_id"], profile["start_year"], profile["data"]
+        )
+    return request
+
+
+def run_plan(plan, ecl_case=None, timings=None, *, refresh=False):
+    """Calculate ecl_case, or the ecl case of the compiled config, with the
+    plan, like stea.calculate() does for a SteaInput."""
+    if timings is None:
+        timings = Timings()
+    project = SteaProject(plan["project"])
+    with timings.phase(SUMMARY_LOAD):
+        plan_input = PlanInput(plan["config"], ecl_case)
+    client = SteaClient.from_config(plan_input.config, timings=timings)
+    with timings.phase(PROFILE_EXTRACTION):
+        request = plan_request(plan, plan_input, project)
+    with timings.phase(CALCULATE_POST):
+        data = client.calculate(request, refresh=refresh)
+    return SteaResult(data, plan_input, project=project, request=request)
@@ -0,0 +1,157 @@
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import warnings
+from pathlib import Path
+
+# The default bucket files are kept in /tmp, not in tempfile.gettempdir(),
+# as a TMPDIR set per job would stop the realizations on a node from sharing
+# them.
+RATE_LIMIT_DIR = Path("/tmp")
+
+
+class TokenBucket:
+    """Limits requests to rate per second, allowing bursts of up to burst
+    requests. With a path, the bucket is kept in that file and shared by all
+    the processes using it, e.g. all realizations running on a node. If the
+    file cannot be used, the bucket falls back to limiting the requests of
+    this process only."""
+
+    def __init__(self, rate, burst=1, path=None):
+        self.rate = rate
+        self.burst = burst
+        self.path = None if path is None else Path(path)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.time()
+
+    def acquire(self):
+        """Wait until a request may be made."""
+        while (delay := self._take()) > 0:
+            time.sleep(delay)
+
+    def _take(self):
+        """Take a token from the bucket; returns 0, or how long to wait for
+        the next token if the bucket is empty."""
+        with self._lock:
+            if self.path is None:
+                self._tokens, self._updated, delay = self._refill(
+                    self._tokens, self._updated
+                )
+                return delay
+
+            try:
+                return self._take_shared()
+            except OSError as err:
+                warnings.warn(
+                    f"Could not use the rate limit file {self.path}: {err}; "
+                    "only the requests of this process are limited",
+                    stacklevel=3,
+                )
+                self.path = None
+            self._tokens, self._updated, delay = self._refill(
+                self._tokens, self._updated
+            )
+            return delay
+
+    def _take_shared(self):
+        # Read and writable by the other users allowed by the umask, so that
+        # a bucket file set with rate-limit-file can be shared between users
+        descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        with os.fdopen(descriptor, "r+", encoding="utf-8") as fstate:
+            # The lock is released when the file is closed
+            fcntl.flock(fstate, fcntl.LOCK_EX)
+            try:
+                tokens, updated = (float(value) for value in fstate.read().split())
+            except ValueError:
+                # A new, or a corrupt, bucket starts full
+                tokens, updated = float(self.burst), time.time()
+            tokens, updated, delay = self._refill(tokens, updated)
+            fstate.seek(0)
+            fstate.truncate()
+            fstate.write(f"{tokens!r} {updated!r}\n")
+            return delay
+
+    def _refill(self, tokens, updated):
+        now = time.time()
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+        return tokens, now, (1 - tokens) / self.rate
+
+
+class AdaptiveConcurrency:
+    """Limits the number of requests in flight, adapting the limit to the
+    load on the server with additive increase, multiplicative decrease: the
+    limit grows by one for each limit of requests completing normally, and
+    is multiplied by decrease when a request is throttled (429 or 503),
+    times out, or takes more than latency_factor times the lowest latency
+    seen. The limit is decreased at most once for the requests in flight
+    at the same time."""
+
+    def __init__(
+        self,
+        maximum,
+        *,
+        initial=None,
+        minimum=1,
+        decrease=0.5,
+        latency_factor=2.0,
+    ):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.limit = float(initial or maximum)
+        self.in_flight = 0
+        self._min_latency = None
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait until another request may be put in flight."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    def release(self, latency, *, congested=False):
+        """Register a completed request, and how long it took."""
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if self._min_latency is None or latency < self._min_latency:
+                self._min_latency = latency
+            slow = latency > self.latency_factor * self._min_latency
+            if congested or slow:
+                # Only requests started after the last decrease can tell
+                # whether the decrease was enough.
+                if now - latency > self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+def rate_limiter(config):
+    """Create the token bucket configured with the rate-limit keyword, kept in
+    the rate-limit-file, by default a file shared by all processes of the user
+    on the node using the same server; returns None if no rate limit is
+    set."""
+    if not config.rate_limit:
+        return None
+    path = config.rate_limit_file
+    if path is None:
+        server_hash = hashlib.sha256(config.stea_server.encode("utf-8")).hexdigest()
+        path = RATE_LIMIT_DIR / f"stea_rate_limit_{os.getuid()}_{server_hash[:16]}"
+    return TokenBucket(config.rate_limit, burst=config.rate_limit_burst, path=path)
+
+
+def adaptive_concurrency(config):
+    """Create the adaptive concurrency limit, up to pool-size requests in
+    flight, if the adaptive-concurrency keyword is set; otherwise None."""
+    if not config.adaptive_concurrency:
+        return None
+    return AdaptiveConcurrency(config.pool_size)
@@ -0,0 +1,186 @@
+import asyncio
+import email.utils
+import json
+import random
+import time
+
+import httpx
+
+from .stea_cache import project_cache
+from .stea_client import (
+    ACCEPT_ENCODING,
+    RETRY_STATUS_CODES,
+    date_string,
+    encode_json,
+)
+from .stea_project import SteaProject
+
+# Errors after the request was sent, which like in SteaClient are not retried
+# for the Calculate POST.
+READ_ERRORS = (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def retry_after(response):
+    """The delay in seconds asked for by a Retry-After header, which can be
+    given either as a number of seconds or as a HTTP date."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncSteaClient:
+    """Asynchronous counterpart to SteaClient, for running many calculations
+    concurrently from one process. At most max_concurrency requests are in
+    flight at any time; retries follow the same rules as in SteaClient.
+
+    The client should be closed after use, preferably by using it as an
+    async context manager.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        server,
+        cache=None,
+        *,
+        connect_timeout=10.0,
+        read_timeout=60.0,
+        retries=3,
+        backoff_factor=0.5,
+        max_concurrency=10,
+        compression=None,
+    ):
+        self.server = server
+        self.cache = cache
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.compression = compression
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Certificate verification is skipped for the same reason as in
+        # SteaClient.
+        self._client = httpx.AsyncClient(
+            verify=False,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+
+    @classmethod
+    def from_config(cls, config, max_concurrency=None):
+        return cls(
+            config.stea_server,
+            cache=project_cache(config),
+            connect_timeout=config.connect_timeout,
+            read_timeout=config.read_timeout,
+            retries=config.retries,
+            backoff_factor=config.backoff_factor,
+            max_concurrency=max_concurrency or config.pool_size,
+            compression=config.compression,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _backoff(self, retry):
+        return self.backoff_factor * 2 ** (retry - 1) + random.uniform(
+            0, self.backoff_factor
+        )
+
+    async def _request(self, method, url, **kwargs):
+        retry = 0
+        while True:
+            retry += 1
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as error:
+                if retry > self.retries or (
+                    method == "POST" and isinstance(error, READ_ERRORS)
+                ):
+                    raise
+                delay = self._backoff(retry)
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or retry > self.retries
+                ):
+                    return response
+                delay = retry_after(response)
+                if delay is None:
+                    delay = self._backoff(retry)
+            await asyncio.sleep(delay)
+
+    async def get_project(self, project_id, project_version, config_date):
+        if self.cache is None:
+            project = await self._fetch_project(
+                project_id, project_version, config_date
+            )
+        else:
+            # The cache is used without its fetch lock here, so concurrent
+            # processes missing the cache might all fetch the project.
+            key = self.cache.key(self.server, project_id, project_version, config_date)
+            project = await asyncio.to_thread(self.cache.get, key)
+            if project is None:
+                project = await self._fetch_project(
+                    project_id, project_version, config_date
+                )
+                await asyncio.to_thread(self.cache.put, key, project)
+        return SteaProject(project)
+
+    async def _fetch_project(self, project_id, project_version, config_date):
+        url = (
+            f"{self.server}/api/v1/Alternative/{project_id}/{project_version}/"
+            f"summary?ConfigurationDate={date_string(config_date)}"
+        )
+        try:
+            response = await self._request("GET", url)
+            if response.status_code != httpx.codes.OK:
+                msg = (
+                    f"Could not GET from: {url}  "
+                    f"status: {response.status_code} msg: {response.text}"
+                )
+                raise httpx.HTTPStatusError(
+                    msg, request=response.request, response=response
+                )
+        except httpx.HTTPError as error:
+            msg = f"HTTP GET from {url} failed"
+            raise RuntimeError(msg) from error
+
+        return json.loads(response.content)
+
+    async def calculate(self, request):
+        url = f"{self.server}/api/v1/Calculate/"
+        try:
+            body, headers = encode_json(request.data(), self.compression)
+            response = await self._request("POST", url, content=body, headers=headers)
+            if response.status_code != httpx.codes.OK:
+                msg = (
+                    f"Could not post to: {url}  status: {response.status_code} "
+                    f"msg: {response.text}"
+                )
+                raise httpx.HTTPStatusError(
+                    msg, request=response.request, response=response
+                )
+        except httpx.HTTPError as error:
+            msg = f"HTTP POST to {url} failed"
+            raise RuntimeError(msg) from error
+
+        return json.loads(response.content)
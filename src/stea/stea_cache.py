@@ -0,0 +1,296 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+CACHE_DIR_ENV = "STEA_CACHE_DIR"
+
+# The files of a summary case, formatted or not, unified or not.
+SUMMARY_FILE_PATTERN = re.compile(r"\.(F?SMSPEC|F?UNSMRY|[AS]\d{4})$", re.IGNORECASE)
+
+
+def _umask():
+    # The umask can only be read by setting it, so it is read once, on import
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Mode of the files written, as for files created with open(): temporary
+# files are only readable by their owner, and the files written here are
+# shared by the realizations, and possibly by other users.
+FILE_MODE = 0o666 & ~_umask()
+
+
+def write_json(path, data, indent=None):
+    """Write data to path atomically, so that concurrent readers never see
+    a partially written file."""
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+    ) as fout:
+        json.dump(data, fout, indent=indent)
+        fout.flush()
+        os.fchmod(fout.fileno(), FILE_MODE)
+        os.fsync(fout.fileno())
+    Path(fout.name).replace(path)
+
+
+class ProjectCache:
+    """File based cache of project summaries fetched from the stea server.
+
+    The cache is meant to be shared between all the realizations of an
+    ensemble, i.e. many processes on possibly many hosts using the same
+    directory on a shared filesystem. Entries are written atomically, so
+    readers never need to lock; the first process missing an entry takes an
+    exclusive lock on it while fetching, and all other processes wait for
+    that lock and then read the stored entry.
+    """
+
+    def __init__(self, directory, ttl=timedelta(days=1), max_size=100 * 1024**2):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(server, project_id, project_version, config_date):
+        ident = f"{server}|{project_id}|{project_version}|{config_date.isoformat()}"
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl.total_seconds():
+                return None
+            with path.open(encoding="utf-8") as fin:
+                return json.load(fin)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Evicted by another process after the stat, or a foreign file;
+            # either way a cache miss.
+            return None
+
+    def put(self, key, data):
+        write_json(self._path(key), data)
+        self.evict()
+
+    def get_or_fetch(self, key, fetch):
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        with self._lock(key):
+            # Another process may have filled the entry while we waited.
+            data = self.get(key)
+            if data is None:
+                data = fetch()
+                self.put(key, data)
+        return data
+
+    def evict(self):
+        """Remove expired entries, and then the oldest entries until the total
+        size of the cache is below max_size."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl.total_seconds():
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        # The lock file goes with the entry, so the directory does not fill up
+        # with the lock files of every project ever fetched. A process about
+        # to take the removed lock may then fetch the project once more than
+        # needed, which is harmless as the entries are written atomically.
+        path.unlink(missing_ok=True)
+        path.with_suffix(".lock").unlink(missing_ok=True)
+
+    @contextmanager
+    def _lock(self, key):
+        with (self.directory / f"{key}.lock").open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ResultCache:
+    """Cache of calculation results in a SQLite database, keyed by a hash of
+    the server and the canonical json of the request, so that posting the
+    same request again, e.g. when rerunning an ensemble, is answered from
+    the cache. The least recently used entries are removed when the total
+    size of the cached results grows beyond max_size.
+
+    SQLite locking is not reliable on network filesystems, so the database
+    should be on a local disk.
+    """
+
+    def __init__(self, path, max_size=100 * 1024**2):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+
+    @staticmethod
+    def key(server, request_data):
+        canonical = json.dumps(request_data, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{server}|{canonical}".encode()).hexdigest()
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=60)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def put(self, key, data):
+        text = json.dumps(data)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, text, len(text), time.time()),
+            )
+            self._evict(connection)
+
+    def _evict(self, connection):
+        (total_size,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+        rows = connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed"
+        ).fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_size:
+                break
+            evicted.append((key,))
+            total_size -= size
+        connection.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+
+class ProductionCache:
+    """File with the yearly production extracted from a summary case, by
+    summary key and time window, kept between runs so that only production
+    for new keys and windows is read from the case; the multipliers and
+    unit conversions are applied after the cache. The file is tied to the
+    path, size and modification time of the files of the summary case, and
+    ignored once the case is changed or another case is used."""
+
+    def __init__(self, path, case):
+        self.path = Path(path)
+        self.source = self.fingerprint(case)
+
+    @staticmethod
+    def fingerprint(case):
+        directory = Path(case.abs_path)
+        files = [str(directory)]
+        for path in sorted(directory.glob(f"{case.base}.*")):
+            if SUMMARY_FILE_PATTERN.search(path.name):
+                stat = path.stat()
+                files.append(f"{path.name}|{stat.st_size}|{stat.st_mtime_ns}")
+        return hashlib.sha256("\n".join(files).encode("utf-8")).hexdigest()
+
+    def load(self):
+        """The cached production by (key, start_date, end_date), empty if
+        there is no cache for the current summary case."""
+        try:
+            with self.path.open(encoding="utf-8") as fin:
+                cached = json.load(fin)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if cached.get("source") != self.source:
+            return {}
+        production = {}
+        for window, values in cached["production"].items():
+            key, start_date, end_date = window.rsplit("|", 2)
+            production[
+                key, date.fromisoformat(start_date), date.fromisoformat(end_date)
+            ] = values
+        return production
+
+    def save(self, production):
+        write_json(
+            self.path,
+            {
+                "source": self.source,
+                "production": {
+                    f"{key}|{start_date.isoformat()}|{end_date.isoformat()}": [
+                        float(value) for value in values
+                    ]
+                    for (key, start_date, end_date), values in production.items()
+                },
+            },
+        )
+
+
+def result_cache(config):
+    """Create the result cache configured with the result-cache keyword;
+    returns None if it is not set."""
+    if not config.result_cache:
+        return None
+    return ResultCache(config.result_cache, max_size=config.result_cache_max_size)
+
+
+def project_cache(config):
+    """Create the project cache configured with the cache-dir keyword, or the
+    STEA_CACHE_DIR environment variable; returns None if neither is set."""
+    directory = config.cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    return ProjectCache(directory, ttl=config.cache_ttl, max_size=config.cache_max_size)
+
+
+def production_cache(config, case):
+    """Create the production cache configured with the production-cache
+    keyword for the summary case; returns None if it is not set."""
+    if not config.production_cache:
+        return None
+    return ProductionCache(config.production_cache, case)
@@ -1,19 +1,76 @@
+import gzip
 import json
+import time
+import zlib
 
 import requests
 import urllib3
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
+from urllib3.util.retry import Retry
 
+from .rate_limit import adaptive_concurrency, rate_limiter
+from .single_flight import SingleFlight
+from .stea_cache import ResultCache, project_cache, result_cache
 from .stea_project import SteaProject
 
+# Status codes for overloaded or restarting servers, worth retrying.
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Status codes of a server asking the clients to slow down.
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+
+# Content encodings for the calculation requests, see encode_json, and the
+# encodings the stea server may use for its responses.
+COMPRESSIONS = {"gzip": gzip.compress, "deflate": zlib.compress}
+ACCEPT_ENCODING = ", ".join(COMPRESSIONS)
+
+# Concurrent identical requests from all the clients in the process, e.g. the
+# threads of a batch run, share one round trip to the server.
+_in_flight = SingleFlight()
+
 
 def date_string(timestamp):
     return timestamp.strftime("%Y-%m-%dT%H:%M:%S")
 
 
+def encode_json(data, compression=None):
+    """The body and headers of a json request, with the body compressed with
+    compression, one of the COMPRESSIONS, if given."""
+    body = json.dumps(data).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if compression is not None:
+        body = COMPRESSIONS[compression](body)
+        headers["Content-Encoding"] = compression
+    return body, headers
+
+
+def _throttled(response):
+    """Whether the server asked the client to slow down, for the response
+    itself or any of the retries leading to it."""
+    statuses = {response.status_code}
+    if response.raw is not None and response.raw.retries is not None:
+        statuses.update(entry.status for entry in response.raw.retries.history)
+    return bool(statuses & THROTTLE_STATUS_CODES)
+
+
 class SteaClient:
-    def __init__(self, server):
+    def __init__(  # noqa: PLR0913
+        self,
+        server,
+        cache=None,
+        *,
+        connect_timeout=10.0,
+        read_timeout=60.0,
+        retries=3,
+        backoff_factor=0.5,
+        pool_size=10,
+        compression=None,
+        result_cache=None,
+        rate_limiter=None,
+        concurrency=None,
+        timings=None,
+    ):
         # Skip certificate verification as the default https_proxy is set to point to
         # port 80 on-premise, making this warning hard to avoid by other means.
         # pylint: disable=no-member
@@ -23,14 +80,104 @@ class SteaClient:
         )
 
         self.server = server
+        self.cache = cache
+        self.compression = compression
+        self.result_cache = result_cache
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.timings = timings
+        self.timeout = (connect_timeout, read_timeout)
+
+        # The calculations are free of side effects on the server, so the
+        # Calculate POST is retried on the same status codes as the GET
+        # requests. It is not retried on read errors though: a calculation
+        # timing out is likely to time out again, and retrying it would only
+        # multiply the load on a server already struggling to keep up.
+        retry = Retry(
+            total=retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"},
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.verify = False
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.mount(
+            f"{server}/api/v1/Calculate/",
+            HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=retry.new(read=0),
+            ),
+        )
+
+    @classmethod
+    def from_config(cls, config, timings=None):
+        return cls(
+            config.stea_server,
+            cache=project_cache(config),
+            connect_timeout=config.connect_timeout,
+            read_timeout=config.read_timeout,
+            retries=config.retries,
+            backoff_factor=config.backoff_factor,
+            pool_size=config.pool_size,
+            compression=config.compression,
+            result_cache=result_cache(config),
+            rate_limiter=rate_limiter(config),
+            concurrency=adaptive_concurrency(config),
+            timings=timings,
+        )
+
+    def _send(self, method, url, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        start = time.perf_counter()
+        congested = True
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            congested = _throttled(response)
+        finally:
+            if self.concurrency is not None:
+                self.concurrency.release(
+                    time.perf_counter() - start, congested=congested
+                )
+        if self.timings is not None:
+            self.timings.add_http(response, time.perf_counter() - start)
+        return response
 
     def get_project(self, project_id, project_version, config_date):
+        project = _in_flight.do(
+            ("project", self.server, project_id, project_version, config_date),
+            lambda: self._get_project(project_id, project_version, config_date),
+        )
+        return SteaProject(project)
+
+    def _get_project(self, project_id, project_version, config_date):
+        if self.cache is None:
+            return self._fetch_project(project_id, project_version, config_date)
+        key = self.cache.key(self.server, project_id, project_version, config_date)
+        return self.cache.get_or_fetch(
+            key,
+            lambda: self._fetch_project(project_id, project_version, config_date),
+        )
+
+    def _fetch_project(self, project_id, project_version, config_date):
         url = (
             f"{self.server}/api/v1/Alternative/{project_id}/{project_version}/"
             f"summary?ConfigurationDate={date_string(config_date)}"
         )
         try:
-            response = requests.get(url, verify=False, timeout=60)
+            response = self._send("GET", url)
 
             # pylint: disable=no-member
             if response.status_code != requests.codes.ok:
@@ -48,13 +195,37 @@ class SteaClient:
         # json formatted string. The interface might offer several formats, and
         # the requests library and the browser might have different default
         # preferences.
-        project = json.loads(response.text)
-        return SteaProject(project)
+        #
+        # The project is parsed from the bytes of the response, which skips
+        # the charset detection done by response.text for large projects.
+        return json.loads(response.content)
+
+    def calculate(self, request, *, refresh=False):
+        """Post the request to the server, or look up the result of an
+        identical request in the result cache, if any. With refresh, the
+        request is always posted and the cached result replaced."""
+        data = request.data()
+        key = ResultCache.key(self.server, data)
+        return _in_flight.do(
+            ("calculate", key, refresh),
+            lambda: self._calculate(data, key, refresh=refresh),
+        )
+
+    def _calculate(self, data, key, *, refresh):
+        if self.result_cache is None:
+            return self._post_calculation(data)
+
+        result = None if refresh else self.result_cache.get(key)
+        if result is None:
+            result = self._post_calculation(data)
+            self.result_cache.put(key, result)
+        return result
 
-    def calculate(self, request):
+    def _post_calculation(self, data):
         url = f"{self.server}/api/v1/Calculate/"
         try:
-            response = requests.post(url, json=request.data(), verify=False, timeout=60)
+            body, headers = encode_json(data, self.compression)
+            response = self._send("POST", url, data=body, headers=headers)
             # pylint: disable=no-member
             if response.status_code != requests.codes.ok:
                 msg = (
@@ -66,4 +237,4 @@ class SteaClient:
             msg = f"HTTP POST to {url} failed"
             raise RuntimeError(msg) from error
 
-        return json.loads(response.text)
+        return json.loads(response.content)
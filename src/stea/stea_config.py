@@ -1,5 +1,5 @@
-from datetime import date, datetime
-from typing import Self
+from datetime import date, datetime, timedelta
+from typing import Literal, Self
 
 from pydantic import (
     BaseModel,
@@ -97,13 +97,169 @@ class SteaConfig(BaseModel):
         description="Specify what STEA should calculate"
     )
     ecl_case: str | None = Field(None, description="ecl case location")
+    summary_reader: Literal["resdata", "mmap"] = Field(
+        "resdata",
+        description=(
+            "How to read the ecl case: with resdata, or, for large unified binary "
+            "cases, by memory mapping the UNSMRY file and reading only the values "
+            "of the keys used. The mmap reader does not read the history of a "
+            "restarted case."
+        ),
+    )
     stea_server: str = Field(
         SteaKeys.PRODUCTION_SERVER,
         description="stea server host",
     )
+    connect_timeout: float = Field(
+        10.0, description="Seconds to wait for a connection to the stea server"
+    )
+    read_timeout: float = Field(
+        60.0, description="Seconds to wait for a response from the stea server"
+    )
+    retries: int = Field(
+        3,
+        description=(
+            "Number of times to retry a request which fails with a connection "
+            "error, a timeout or a busy server (status 429, 500, 502, 503, 504). "
+            "A calculation is not posted again after a read timeout."
+        ),
+    )
+    backoff_factor: float = Field(
+        0.5,
+        description=(
+            "Retries wait backoff-factor * 2^(retry - 1) seconds plus a random "
+            "jitter of up to backoff-factor seconds, or as long as the server "
+            "asks for with a Retry-After header"
+        ),
+    )
+    pool_size: int = Field(
+        10, description="Number of connections to keep open to the stea server"
+    )
+    rate_limit: float | None = Field(
+        None,
+        description=(
+            "Maximum number of requests per second to the stea server, shared "
+            "by all the processes of the user on a node using the same server, "
+            "see rate-limit-file"
+        ),
+    )
+    rate_limit_burst: int = Field(
+        1, description="Number of requests allowed in a burst above the rate-limit"
+    )
+    rate_limit_file: str | None = Field(
+        None,
+        description=(
+            "File keeping the rate-limit state, shared by the processes using it. "
+            "Defaults to a file in /tmp per user and stea server; set it to a "
+            "file writable by all to share the rate-limit between users."
+        ),
+    )
+    adaptive_concurrency: bool = Field(
+        False,  # noqa: FBT003
+        description=(
+            "Adapt the number of requests in flight, up to pool-size, to the "
+            "load on the server: fewer when it throttles or slows down, and "
+            "gradually more while it keeps up"
+        ),
+    )
+    compression: Literal["gzip", "deflate"] | None = Field(
+        None,
+        description=(
+            "Compress the calculation requests sent to the stea server with gzip "
+            "or deflate. The server must accept compressed request bodies."
+        ),
+    )
+    cache_dir: str | None = Field(
+        None,
+        description=(
+            "Directory for caching project data fetched from the stea server, "
+            "typically on a filesystem shared by all realizations in an ensemble. "
+            "Can also be set with the STEA_CACHE_DIR environment variable. "
+            "No caching is done unless this is set."
+        ),
+    )
+    cache_ttl: timedelta = Field(
+        timedelta(days=1),
+        description="How long a cached project is valid, in seconds",
+    )
+    cache_max_size: int = Field(
+        100 * 1024**2,
+        description="Maximum size in bytes of the cache directory",
+    )
+    result_cache: str | None = Field(
+        None,
+        description=(
+            "SQLite file, on a local disk, for caching calculation results. "
+            "Requests identical to an earlier request to the same server are "
+            "answered from the cache. No caching is done unless this is set."
+        ),
+    )
+    result_cache_max_size: int = Field(
+        100 * 1024**2,
+        description=(
+            "Maximum size in bytes of the cached results, the least recently "
+            "used results are removed first"
+        ),
+    )
+    production_cache: str | None = Field(
+        None,
+        description=(
+            "File for keeping the production extracted from the ecl case between "
+            "runs, e.g. in the runpath. Reruns only read the summary keys and "
+            "time windows not already in the file, as long as the ecl case is "
+            "unchanged; changed multipliers are applied to the kept production. "
+            "For the batch command, a relative path is taken from the runpath "
+            "of each case."
+        ),
+    )
+    response_compact: bool = Field(
+        False,  # noqa: FBT003
+        description="Write the response file without indentation and whitespace",
+    )
+    response_gzip: bool = Field(
+        False,  # noqa: FBT003
+        description="Write the response file gzip compressed, with a .gz suffix",
+    )
+    response_profiles: Literal["all", "adjusted", "none"] = Field(
+        "all",
+        description=(
+            "Which of the project profiles to include in the response file: all "
+            "of them, only those adjusted by the calculation, or none"
+        ),
+    )
+    record_file: str | None = Field(
+        None,
+        description=(
+            "Also write the results for all tax modes and the adjusted profiles "
+            "as columns to this json file next to the response file, to be "
+            "merged for an ensemble with the aggregate command"
+        ),
+    )
+    profile_catalogue: str | None = Field(
+        None,
+        description=(
+            "Directory shared by the realizations where the profiles of the "
+            "project are written once, and referred to from the response files. "
+            "The response files then include none of the profiles, unless "
+            "response-profiles is set to adjusted."
+        ),
+    )
 
     @field_validator("ecl_profiles")
     @classmethod
     def non_empty(cls, value: dict):
         assert len(value) != 0, "Can not be empty"
         return value
+
+    @model_validator(mode="after")
+    def check_response_profiles(self) -> Self:
+        if self.profile_catalogue:
+            if "response_profiles" not in self.model_fields_set:
+                self.response_profiles = "none"
+            elif self.response_profiles == "all":
+                msg = (
+                    "With a profile-catalogue, response-profiles must be "
+                    "adjusted or none"
+                )
+                raise ValueError(msg)
+        return self
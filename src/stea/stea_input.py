@@ -3,32 +3,50 @@ from __future__ import annotations
 from pathlib import Path
 
 import yaml
-from resdata.summary import Summary
 
 from .stea_config import SteaConfig
+from .summary_index import YearlyIndex, load_case
 
 
-class SteaInput:
-    # pylint: disable=too-few-public-methods
-    def __init__(self, config_file: Path, ecl_case: str | None = None):
-        try:  # noqa: PLW0717
-            config_dict = yaml.safe_load(Path(config_file).read_text(encoding="utf-8"))
-            if ecl_case:
-                if "ecl-case" in config_dict:
-                    del config_dict["ecl-case"]
-                config_dict["ecl_case"] = ecl_case
-            config = SteaConfig(**config_dict)
+def load_config(config_file: Path, ecl_case: str | None = None) -> SteaConfig:
+    try:
+        config_dict = yaml.safe_load(Path(config_file).read_text(encoding="utf-8"))
+        if ecl_case:
+            if "ecl-case" in config_dict:
+                del config_dict["ecl-case"]
+            config_dict["ecl_case"] = ecl_case
+        return SteaConfig(**config_dict)
 
-            self.config = config
+    except Exception as ex:
+        msg = f"Could not load config file: {config_file}, error: {ex}"
+        raise ValueError(msg) from ex
 
-        except Exception as ex:
-            msg = f"Could not load config file: {config_file}, error: {ex}"
-            raise ValueError(msg) from ex
 
+class SteaInput:
+    # pylint: disable=too-few-public-methods
+    def __init__(self, config_file: Path, ecl_case: str | None = None):
+        self.config = load_config(config_file, ecl_case)
+        self._load_case()
+
+    @classmethod
+    def from_config(cls, config: SteaConfig, ecl_case: str | None = None):
+        """Create an input from an already loaded config, optionally for
+        another ecl case than the one in the config."""
+        if ecl_case:
+            config = config.model_copy(update={"ecl_case": ecl_case})
+        stea_input = cls.__new__(cls)
+        stea_input.config = config
+        stea_input._load_case()  # noqa: SLF001
+        return stea_input
+
+    def _load_case(self):
         # pylint: disable=access-member-before-definition
         # (due to modified __getattr__)
         if self.ecl_case is not None:
-            self.ecl_case = Summary(self.ecl_case)
+            self.ecl_case = load_case(self.ecl_case, self.summary_reader)
+            self.summary_index = YearlyIndex(self.ecl_case)
+        else:
+            self.summary_index = None
 
     def __getattr__(self, key):
         """Make all values in the config available as object attributes"""
@@ -1,4 +1,6 @@
-from .stea_keys import SteaKeys
+from collections import defaultdict
+
+from .stea_keys import SteaInputKeys, SteaKeys
 
 
 class SteaProject:
@@ -6,12 +8,24 @@ class SteaProject:
         self.profiles = {
             profile[SteaKeys.PROFILE_ID]: profile for profile in data[SteaKeys.PROFILES]
         }
+        self.profiles_by_description = defaultdict(list)
+        for profile_id, profile in self.profiles.items():
+            description = profile.get(SteaInputKeys.PROFILE_KEY)
+            if description is not None:
+                self.profiles_by_description[description].append(profile_id)
         self.project_id = data[SteaKeys.PROJECT_ID]
         self.project_version = data[SteaKeys.PROJECT_VERSION]
 
     def has_profile(self, profile_id):
         return profile_id in self.profiles
 
+    def find_profiles(self, id_or_description):
+        """The ids of the profiles identified by id_or_description; either a
+        single profile id, or the ids of all profiles with that description."""
+        if id_or_description in self.profiles:
+            return [id_or_description]
+        return list(self.profiles_by_description.get(id_or_description, []))
+
     def get_profile(self, profile_id):
         return self.profiles[profile_id]
 
@@ -1,12 +1,14 @@
 import datetime
 import sys
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
 
 if TYPE_CHECKING:
     from resdata.summary import Summary
 
-import operator
-
+from .stea_cache import production_cache
 from .stea_keys import SteaKeys
 
 
@@ -16,14 +18,51 @@ def date_string(timestamp):
 
 BARRELS_PR_SM3 = 6.2898
 
+# Factors from the units of the Eclipse case to the units of the project
+# profiles, and the scale factors of the multiple of the profiles.
+UNITS = {"Bbl": {"SM3": BARRELS_PR_SM3}, "Sm3": {"SM3": 1.0}}
+SCALE_FACTORS = {"1": 1.0, "Mill": 1.0e-6, "1000 Mill": 1.0e-9}
+
+
+def profile_conversion(project, profile_id, units=UNITS, scale_factors=SCALE_FACTORS):
+    """The unit of the profile in the project, the factors to it from the
+    units of the Eclipse case, and the scale factor of its multiple."""
+    unit = project.get_profile_unit(profile_id)
+    mult = project.get_profile_mult(profile_id)
+    return unit, units.get(unit, {}), scale_factors[mult]
+
+
+class EclProfile(NamedTuple):
+    """A profile to be calculated from a summary key in the Eclipse case."""
+
+    profile_id: str
+    key: str
+    start_date: datetime.date | None = None
+    end_year: int | None = None
+    multiplier: list[float] | tuple[float, ...] = (1,)
+    global_multiplier: float = 1
+
 
 class SteaRequest:
-    def __init__(self, stea_input, project):
-        self.units = {"Bbl": {"SM3": BARRELS_PR_SM3}, "Sm3": {"SM3": 1.0}}
-        self.scale_factors = {"1": 1.0, "Mill": 1.0e-6, "1000 Mill": 1.0e-9}
+    def __init__(self, stea_input, project, conversions=None):
+        """The conversions are the unit conversions of the profiles by
+        profile id, as from profile_conversion(), e.g. from a compiled plan;
+        by default they are looked up in the project when needed."""
+        self.units = UNITS
+        self.scale_factors = SCALE_FACTORS
 
         self.stea_input = stea_input
         self.project = project
+        self.conversions = {} if conversions is None else dict(conversions)
+        # Yearly production from the Eclipse case, by (key, start_date, end_date)
+        self._production = {}
+        self._production_cache = None
+        if stea_input.ecl_case is not None:
+            self._production_cache = production_cache(
+                stea_input.config, stea_input.ecl_case
+            )
+        if self._production_cache is not None:
+            self._production.update(self._production_cache.load())
         self.request_data = {
             SteaKeys.PROJECT_ID: project.project_id,
             SteaKeys.PROJECT_VERSION: project.project_version,
@@ -62,64 +101,121 @@ class SteaRequest:
         if multiplier is None:
             multiplier = [1]
 
+        self.add_ecl_profiles(
+            [
+                EclProfile(
+                    profile_id,
+                    key,
+                    start_date=start_date,
+                    end_year=end_year,
+                    multiplier=multiplier,
+                    global_multiplier=global_multiplier,
+                )
+            ]
+        )
+
+    def add_ecl_profiles(self, profiles: list[EclProfile]):
+        """Add several profiles calculated from the Eclipse case.
+
+        Profiles sharing the same time window are extracted together: the
+        yearly time range and the range to crop are created once per window,
+        and the blocked productions are scaled as one 2-D array with a row
+        per profile.
+        """
         if self.stea_input.ecl_case is None:
             msg = "When adding ecl_profile you must configure an Eclipse case"
             raise ValueError(msg)
 
         case: Summary = self.stea_input.ecl_case
-        if key not in case:
-            msg = f"No such summary key: {key}"
-            raise KeyError(msg)
+        windows = defaultdict(list)
+        for index, profile in enumerate(profiles):
+            if profile.key not in case:
+                msg = f"No such summary key: {profile.key}"
+                raise KeyError(msg)
+
+            start_date = profile.start_date
+            if start_date is None:
+                start_date = case.start_date
+
+            if profile.end_year is None:
+                end_date = case.end_date
+            else:
+                end_date = datetime.date(profile.end_year, 12, 31)
+                # only the year part of this date is used by time_range()
+
+            windows[start_date, end_date].append(index)
+
+        profile_data = {}
+        num_extracted = len(self._production)
+        for (start_date, end_date), indices in windows.items():
+            window_profiles = [profiles[index] for index in indices]
+            data = self._extract_window(case, start_date, end_date, window_profiles)
+            for index, row in zip(indices, data, strict=True):
+                profile_data[index] = (start_date.year, row.tolist())
+        if self._production_cache is not None and len(self._production) > num_extracted:
+            self._production_cache.save(self._production)
+
+        for index, profile in enumerate(profiles):
+            self.add_profile(profile.profile_id, *profile_data[index])
+
+    def _extract_window(self, case, start_date, end_date, profiles):
+        missing_keys = [
+            key
+            for key in dict.fromkeys(profile.key for profile in profiles)
+            if (key, start_date, end_date) not in self._production
+        ]
+        if missing_keys:
+            self._extract_production(start_date, end_date, missing_keys)
+
+        unit_conversion = np.array(
+            [
+                self._unit_conversion(profile.profile_id, case.unit(profile.key))
+                for profile in profiles
+            ]
+        )
+        data = np.array(
+            [
+                self._production[profile.key, start_date, end_date]
+                for profile in profiles
+            ]
+        )
+        data *= unit_conversion[:, np.newaxis]
+
+        multiplier = np.ones_like(data)
+        for row, profile in enumerate(profiles):
+            mult_rangeend = min(len(profile.multiplier), data.shape[1])
+            multiplier[row, :mult_rangeend] = profile.multiplier[:mult_rangeend]
+        global_multiplier = np.array(
+            [profile.global_multiplier for profile in profiles]
+        )
 
-        if start_date is None:
-            start_date = case.start_date
+        return data * multiplier * global_multiplier[:, np.newaxis]
 
-        if end_year is None:
-            end_date = case.end_date
-        else:
-            end_date = datetime.date(end_year, 12, 31)
-            # only the year part of this date is used by time_range()
-
-        start_year_jan1 = datetime.date(start_date.year, 1, 1)
-        time_range_to_crop = None
-        if start_date > start_year_jan1 and start_date > case.start_date:
-            # Profile must be cropped with a finer than yearly resolution,
-            # ecl's time_range and blocked_productions do not support this directly:
-            time_range_to_crop = case.time_range(
-                start=datetime.date(start_date.year, 1, 1),
-                end=start_date,
-                interval="1d",
+    def _extract_production(self, start_date, end_date, keys):
+        """Store the yearly production of each key in the window in the
+        _production memo. Several profiles commonly use the same key and
+        window, only differing in their multipliers."""
+        index = self.stea_input.summary_index
+        for key in keys:
+            self._production[key, start_date, end_date] = index.production(
+                key, start_date, end_date
             )
 
-        ecl_unit = case.unit(key)
+    def conversion(self, profile_id):
+        """The unit conversion of the profile, see profile_conversion()."""
+        if profile_id not in self.conversions:
+            self.conversions[profile_id] = profile_conversion(
+                self.project, profile_id, self.units, self.scale_factors
+            )
+        return self.conversions[profile_id]
 
-        unit = self.project.get_profile_unit(profile_id)
-        mult = self.project.get_profile_mult(profile_id)
-        if unit in self.units and ecl_unit in self.units[unit]:
-            unitfactor = self.units[unit][ecl_unit]
+    def _unit_conversion(self, profile_id, ecl_unit):
+        unit, factors, scale_factor = self.conversion(profile_id)
+        if ecl_unit in factors:
+            unitfactor = factors[ecl_unit]
         else:
             unitfactor = 1.0
             sys.stdout.write(
                 f"Default conversion between {unit} and {ecl_unit} to 1.\n"
             )
-        unit_conversion = unitfactor * self.scale_factors[mult]
-        data = list(
-            case.blocked_production(
-                key, case.time_range(start=start_year_jan1, end=end_date, interval="1y")
-            )
-            * unit_conversion
-        )
-
-        if time_range_to_crop is not None:
-            deduct = list(
-                case.blocked_production(key, time_range_to_crop) * unit_conversion
-            )
-            data[0] -= sum(deduct)
-
-        mult_rangeend = min(len(multiplier), len(data))
-        data[:mult_rangeend] = map(
-            operator.mul, data[:mult_rangeend], multiplier[:mult_rangeend]
-        )
-
-        data = [x * global_multiplier for x in data]
-        self.add_profile(profile_id, start_date.year, data)
+        return unitfactor * scale_factor
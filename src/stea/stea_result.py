@@ -3,9 +3,13 @@ from .stea_keys import SteaKeys
 
 class SteaResult:
     # pylint: disable=too-few-public-methods
-    def __init__(self, data, stea_input):
+    def __init__(self, data, stea_input, project=None, request=None):
         self.data = data
         self.stea_input = stea_input
+        # The project and request the calculation was based on, kept so that
+        # callers can reuse them without another round trip to the server.
+        self.project = project
+        self.request = request
 
     def results(self, tax_mode):
         res = {}
@@ -18,3 +22,32 @@ class SteaResult:
 
         msg = f"No such tax mode: {tax_mode}"
         raise KeyError(msg)
+
+    def records(self):
+        """The results for all tax modes, and the yearly profiles adjusted by
+        the request, as two tables of equally long columns:
+
+        values: tax_mode, key, value
+        profiles: profile_id, year, value
+        """
+        values = {"tax_mode": [], "key": [], "value": []}
+        for value_dict in self.data[SteaKeys.KEY_VALUES]:
+            for key, value in value_dict[SteaKeys.VALUES].items():
+                values["tax_mode"].append(value_dict[SteaKeys.TAX_MODE])
+                values["key"].append(key)
+                values["value"].append(value)
+
+        profiles = {"profile_id": [], "year": [], "value": []}
+        if self.request is not None:
+            adjustments = self.request.data()[SteaKeys.ADJUSTMENTS]
+            for profile in adjustments[SteaKeys.PROFILES]:
+                data = profile[SteaKeys.DATA_OUTER]
+                start_year = data[SteaKeys.START_YEAR]
+                for year, value in enumerate(
+                    data[SteaKeys.DATA_INNER], start=start_year
+                ):
+                    profiles["profile_id"].append(profile[SteaKeys.PROFILE_ID])
+                    profiles["year"].append(year)
+                    profiles["value"].append(value)
+
+        return {"values": values, "profiles": profiles}
@@ -0,0 +1,92 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+TIMINGS_FILE = "stea_timings.json"
+
+# The phases of a forward model run, in the order they happen.
+CONFIG = "config"
+SUMMARY_LOAD = "summary_load"
+PROJECT_GET = "project_get"
+PROFILE_EXTRACTION = "profile_extraction"
+CALCULATE_POST = "calculate_post"
+WRITE_RESPONSE = "write_response"
+
+_TRACER_NAME = "stea"
+
+
+def _tracer():
+    """The OpenTelemetry tracer for the stea spans, or None when the
+    opentelemetry api is not installed. Without a configured SDK the api
+    hands out non-recording spans, so the spans are close to free then."""
+    # pylint: disable=import-outside-toplevel
+    try:
+        from opentelemetry import trace  # noqa: PLC0415
+    except ImportError:
+        return None
+    return trace.get_tracer(_TRACER_NAME)
+
+
+class Timings:
+    """Wall time of each phase of a calculation, and a record of each HTTP
+    request made, so slow realizations can be attributed to the config,
+    the summary case, the network or the server.
+
+    The phases may overlap, e.g. the project is fetched while the summary
+    case is loaded, so the total is the wall time since the timings were
+    created rather than the sum of the phases. The phases are also emitted
+    as OpenTelemetry spans when the opentelemetry api is installed.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.phases = {}
+        self.http = []
+        self._tracer = _tracer()
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of the with statement as the phase name; the time of
+        a phase entered more than once is accumulated."""
+        span = (
+            nullcontext()
+            if self._tracer is None
+            else self._tracer.start_as_current_span(f"stea.{name}")
+        )
+        start = time.perf_counter()
+        try:
+            with span:
+                yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_http(self, response, elapsed):
+        """Record a completed requests response. The bytes received are
+        those of the body on the wire, before any content decoding."""
+        retries = response.raw.retries if response.raw is not None else None
+        received = (
+            len(response.content) if response.raw is None else response.raw.tell()
+        )
+        self.http.append(
+            {
+                "method": response.request.method,
+                "url": response.request.url,
+                "status": response.status_code,
+                "retries": 0 if retries is None else len(retries.history),
+                "bytes_sent": len(response.request.body or b""),
+                "bytes_received": received,
+                "elapsed": elapsed,
+            }
+        )
+
+    def data(self):
+        return {
+            "phases": dict(self.phases),
+            "total": time.perf_counter() - self._start,
+            "http": list(self.http),
+        }
+
+    def write(self, path):
+        with Path(path).open("w", encoding="utf-8") as fout:
+            json.dump(self.data(), fout, indent=4)
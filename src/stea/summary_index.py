@@ -0,0 +1,100 @@
+import datetime
+from functools import cached_property
+
+import numpy as np
+from resdata.summary import Summary
+
+from .mapped_summary import MappedSummary
+
+
+def load_case(ecl_case, summary_reader="resdata"):
+    """Open the summary case with the summary-reader of the config."""
+    if summary_reader == "mmap":
+        return MappedSummary(ecl_case)
+    # resdata cannot restrict the read to the keys of the ecl-profiles; the
+    # mmap reader only reads the values of the keys used.
+    return Summary(ecl_case)
+
+
+def cumulative(case, key, time):
+    """The value of the total key at time, extended like in
+    Summary.blocked_production: zero before the start of the case, and the
+    last value after the end."""
+    if time < case.start_time:
+        return 0.0
+    if time >= case.end_time:
+        return case.last_value(key)
+    return case.get_interp(key, date=time)
+
+
+def _midnight(day):
+    return datetime.datetime.combine(day, datetime.time())
+
+
+class YearlyIndex:
+    """The cumulative values of the total keys of a summary case at the
+    start of each year, from Jan 1 of the first year with data, or the
+    start of the data if later, to Jan 1 of the year after the end. The
+    values are interpolated once per key, when first used, so the yearly
+    production of a key in any time window is a slice of differences.
+
+    Nothing is read from the case until the index is first used.
+    """
+
+    def __init__(self, case):
+        self.case = case
+        self._cumulative = {}
+
+    @cached_property
+    def data_start(self):
+        return self.case.get_data_start_time()
+
+    @cached_property
+    def boundaries(self):
+        last_year = self.case.get_end_time().year + 1
+        boundaries = [
+            datetime.datetime(year, 1, 1)
+            for year in range(self.data_start.year, last_year + 1)
+        ]
+        boundaries[0] = max(boundaries[0], self.data_start)
+        return boundaries
+
+    def cumulative(self, key):
+        """The cumulative values of key at the boundaries."""
+        if key not in self._cumulative:
+            self._cumulative[key] = np.array(
+                [cumulative(self.case, key, time) for time in self.boundaries]
+            )
+        return self._cumulative[key]
+
+    def production(self, key, start_date, end_date):
+        """The yearly production of the total key from start_date through
+        the year of end_date, as from Summary.blocked_production with a
+        yearly Summary.time_range; production before start_date in its
+        first year is left out."""
+        if not Summary.is_total(key):
+            msg = (
+                "The production must be extracted from one of the TOTAL keys "
+                f"like e.g. FOPT or GWIT, not {key}"
+            )
+            raise TypeError(msg)
+
+        jan1 = _midnight(datetime.date(start_date.year, 1, 1))
+        start = max(jan1, self.data_start)
+        end = min(_midnight(end_date), self.case.get_end_time())
+        if end < start:
+            msg = "Invalid time interval start after end"
+            raise ValueError(msg)
+
+        first = start.year - self.data_start.year
+        last = end.year + 1 - self.data_start.year
+        production = np.diff(self.cumulative(key)[first : last + 1])
+
+        if start_date > jan1.date() and start_date > self.case.start_date:
+            # Profile must be cropped with a finer than yearly resolution;
+            # the production from Jan 1, or the start of the data, up to the
+            # start date is the difference of the cumulative values there.
+            production[0] -= cumulative(
+                self.case, key, _midnight(start_date)
+            ) - cumulative(self.case, key, start)
+        return production
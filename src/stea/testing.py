@@ -0,0 +1,220 @@
+"""A local stand-in for the stea server, for testing and load testing the
+client without access to the real server:
+
+    with FakeSteaServer(project, latency=0.05, error_rate=0.01) as server:
+        client = SteaClient(server.url)
+        ...
+
+The server answers project requests with the given project data, and
+calculations with results computed from the posted profiles.
+"""
+
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .stea_keys import SteaKeys
+
+PROJECT_PATH = re.compile(r"^/api/v1/Alternative/(\d+)/(\d+)/summary(\?.*)?$")
+CALCULATE_PATH = re.compile(r"^/api/v1/Calculate/?$")
+
+DECOMPRESS = {"gzip": gzip.decompress, "deflate": zlib.decompress}
+
+
+class FakeSteaServer:
+    """A stea server running in a background thread on a free local port.
+
+    The results of a calculation are deterministic: NPV is the sum of all
+    the posted profile values, discounted by discount_rate per year from
+    the year of the config date, before tax for the Pretax tax mode and
+    after tax_rate for the Corporate tax mode. Any other result asked for
+    is set to the undiscounted sum.
+
+    Each request is delayed by latency seconds, fails with status 500 with
+    probability error_rate, and is answered with status 429 and a
+    Retry-After of retry_after seconds when more than max_in_flight
+    requests are in flight. The failures are drawn from a random generator
+    seeded with seed, so a sequential run is reproducible.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        project,
+        *,
+        latency=0.0,
+        error_rate=0.0,
+        max_in_flight=None,
+        retry_after=0,
+        discount_rate=0.08,
+        tax_rate=0.78,
+        seed=0,
+    ):
+        self.project = project
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.discount_rate = discount_rate
+        self.tax_rate = tax_rate
+        # (method, path, status) of each request answered
+        self.log = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, method, status=HTTPStatus.OK):
+        """Number of requests with method answered with status."""
+        with self._lock:
+            return sum(
+                1
+                for logged_method, _, logged_status in self.log
+                if logged_method == method and logged_status == status
+            )
+
+    def calculate(self, request_data):
+        """The result of the calculation of request_data."""
+        base_year = datetime.fromisoformat(request_data[SteaKeys.CONFIG_DATE]).year
+        npv = 0.0
+        total = 0.0
+        for profile in request_data[SteaKeys.ADJUSTMENTS][SteaKeys.PROFILES]:
+            data = profile[SteaKeys.DATA_OUTER]
+            for year, value in enumerate(
+                data[SteaKeys.DATA_INNER], start=data[SteaKeys.START_YEAR]
+            ):
+                npv += value / (1 + self.discount_rate) ** (year - base_year)
+                total += value
+
+        def values(factor):
+            return {
+                key: (npv if key == "NPV" else total) * factor
+                for key in request_data[SteaKeys.RESULTS]
+            }
+
+        return {
+            SteaKeys.KEY_VALUES: [
+                {SteaKeys.TAX_MODE: SteaKeys.PRETAX, SteaKeys.VALUES: values(1)},
+                {
+                    SteaKeys.TAX_MODE: SteaKeys.CORPORATE,
+                    SteaKeys.VALUES: values(1 - self.tax_rate),
+                },
+            ]
+        }
+
+    def _enter(self):
+        """Register a new request; returns the status to fail it with, if
+        it should fail."""
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.max_in_flight is not None and self.in_flight > self.max_in_flight:
+                return HTTPStatus.TOO_MANY_REQUESTS
+            if self._random.random() < self.error_rate:
+                return HTTPStatus.INTERNAL_SERVER_ERROR
+            return None
+
+    def _exit(self, method, path, status):
+        with self._lock:
+            self.in_flight -= 1
+            self.log.append((method, path, status))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep the connections alive, like the real server, without the delayed
+    # acknowledgements of the separately written headers and body.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle(self._get_project)
+
+    def do_POST(self):
+        self._handle(self._calculate)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _handle(self, answer):
+        fake = self.server.fake
+        body = self._read_body()
+        status = fake._enter()  # noqa: SLF001
+        try:
+            time.sleep(fake.latency)
+            status, data = (
+                answer(fake, body)
+                if status is None
+                else (status, {"Message": status.phrase})
+            )
+            self._respond(status, data, fake)
+        finally:
+            fake._exit(self.command, self.path, status)  # noqa: SLF001
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        encoding = self.headers.get("Content-Encoding")
+        if encoding in DECOMPRESS:
+            body = DECOMPRESS[encoding](body)
+        return body
+
+    def _get_project(self, fake, _):
+        match = PROJECT_PATH.match(self.path)
+        if match is None:
+            return HTTPStatus.NOT_FOUND, {"Message": f"No such path: {self.path}"}
+        project_id, project_version = (int(group) for group in match.group(1, 2))
+        if (project_id, project_version) != (
+            fake.project[SteaKeys.PROJECT_ID],
+            fake.project[SteaKeys.PROJECT_VERSION],
+        ):
+            return HTTPStatus.NOT_FOUND, {"Message": "No such project"}
+        return HTTPStatus.OK, fake.project
+
+    def _calculate(self, fake, body):
+        if CALCULATE_PATH.match(self.path) is None:
+            return HTTPStatus.NOT_FOUND, {"Message": f"No such path: {self.path}"}
+        try:
+            return HTTPStatus.OK, fake.calculate(json.loads(body))
+        except (KeyError, TypeError, ValueError) as err:
+            return HTTPStatus.BAD_REQUEST, {"Message": f"Invalid request: {err}"}
+
+    def _respond(self, status, data, fake):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            self.send_header("Retry-After", str(fake.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
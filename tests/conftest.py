@@ -1,6 +1,55 @@
+import datetime
+
 import pytest
 
-from stea import SteaKeys, SteaProject
+from stea import SteaConfig, SteaKeys, SteaProject
+
+CONFIG_DATE = datetime.datetime(2018, 10, 10, 12, 0, 0)
+PROJECT_URL = "/api/v1/Alternative/1234/1/summary"
+
+PROJECT = {
+    SteaKeys.PROJECT_ID: 1234,
+    SteaKeys.PROJECT_VERSION: 1,
+    SteaKeys.PROFILES: [{SteaKeys.PROFILE_ID: "ID1", SteaKeys.UNIT: "Sm3"}],
+}
+
+
+def minimal_config(**kwargs):
+    """A SteaConfig for PROJECT, with the settings in kwargs."""
+    return SteaConfig(
+        **{
+            "config_date": CONFIG_DATE,
+            "project_id": 1234,
+            "project_version": 1,
+            "ecl_profiles": {"ID1": {"ecl_key": "FOPT"}},
+            "results": ["NPV"],
+            **kwargs,
+        }
+    )
+
+
+class Request:
+    """Stand-in for a SteaRequest, with the given request data."""
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, data=None):
+        self._data = {} if data is None else data
+
+    def data(self):
+        return self._data
+
+
+def profile_request(data, profile_id="ID1", start_year=2020, **fields):
+    """A Request adjusting the profile profile_id with data from start_year,
+    and the other fields of the request data given by fields."""
+    profile = {
+        SteaKeys.PROFILE_ID: profile_id,
+        SteaKeys.DATA_OUTER: {
+            SteaKeys.START_YEAR: start_year,
+            SteaKeys.DATA_INNER: data,
+        },
+    }
+    return Request({**fields, SteaKeys.ADJUSTMENTS: {SteaKeys.PROFILES: [profile]}})
 
 
 @pytest.fixture
@@ -0,0 +1,171 @@
+import datetime
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stea import SteaClient
+from stea.stea_cache import (
+    CACHE_DIR_ENV,
+    FILE_MODE,
+    ProjectCache,
+    ResultCache,
+    project_cache,
+    result_cache,
+)
+
+from .conftest import CONFIG_DATE, PROJECT, Request, minimal_config
+
+# ruff: noqa: PLR2004
+
+
+def test_project_is_fetched_once(httpserver, tmp_path):
+    httpserver.expect_oneshot_request(
+        "/api/v1/Alternative/1234/1/summary"
+    ).respond_with_json(PROJECT)
+    server = httpserver.url_for("").rstrip("/")
+
+    for _ in range(3):
+        client = SteaClient(server, cache=ProjectCache(tmp_path))
+        project = client.get_project(1234, 1, CONFIG_DATE)
+        assert project.has_profile("ID1")
+
+    httpserver.check_assertions()
+    # Readable by the other realizations, not only the owner
+    for path in tmp_path.glob("*.json"):
+        assert stat.S_IMODE(path.stat().st_mode) == FILE_MODE
+
+
+def test_concurrent_misses_fetch_once(tmp_path):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return PROJECT
+
+    def get(_):
+        cache = ProjectCache(tmp_path)
+        return cache.get_or_fetch(cache.key("server", 1234, 1, CONFIG_DATE), fetch)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(get, range(8)))
+
+    assert len(calls) == 1
+    assert all(result == PROJECT for result in results)
+
+
+def test_key_depends_on_all_parts():
+    keys = {
+        ProjectCache.key("server", 1234, 1, CONFIG_DATE),
+        ProjectCache.key("other_server", 1234, 1, CONFIG_DATE),
+        ProjectCache.key("server", 4321, 1, CONFIG_DATE),
+        ProjectCache.key("server", 1234, 2, CONFIG_DATE),
+        ProjectCache.key("server", 1234, 1, datetime.datetime(2018, 10, 11)),
+    }
+    assert len(keys) == 5
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = ProjectCache(tmp_path, ttl=datetime.timedelta(seconds=60))
+    cache.put("key", PROJECT)
+    assert cache.get("key") == PROJECT
+
+    old = time.time() - 120
+    os.utime(tmp_path / "key.json", (old, old))
+    assert cache.get("key") is None
+
+
+def test_eviction_removes_oldest_entries(tmp_path):
+    cache = ProjectCache(tmp_path, max_size=10**6)
+    for index in range(3):
+        cache.get_or_fetch(f"key{index}", lambda: PROJECT)
+        old = time.time() - 100 + index
+        os.utime(tmp_path / f"key{index}.json", (old, old))
+
+    cache.max_size = 2 * (tmp_path / "key0.json").stat().st_size
+    cache.evict()
+
+    assert cache.get("key0") is None
+    assert not (tmp_path / "key0.lock").exists()
+    assert cache.get("key1") == PROJECT
+    assert cache.get("key2") == PROJECT
+    assert (tmp_path / "key1.lock").exists()
+
+
+def test_no_cache_by_default(monkeypatch):
+    monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+    assert project_cache(minimal_config()) is None
+
+
+@pytest.mark.parametrize("from_env", [True, False])
+def test_cache_dir_from_config_or_env(monkeypatch, tmp_path, from_env):
+    if from_env:
+        monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+        config = minimal_config()
+    else:
+        monkeypatch.delenv(CACHE_DIR_ENV, raising=False)
+        config = minimal_config(**{"cache-dir": str(tmp_path), "cache-ttl": 3600})
+
+    cache = project_cache(config)
+    assert cache.directory == tmp_path
+    assert cache.ttl == datetime.timedelta(seconds=3600 if not from_env else 86400)
+
+
+@pytest.mark.parametrize("refresh", [False, True])
+def test_result_is_calculated_once(httpserver, tmp_path, mock_result, refresh):
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_json(
+        mock_result
+    )
+    server = httpserver.url_for("").rstrip("/")
+
+    for _ in range(3):
+        client = SteaClient(server, result_cache=ResultCache(tmp_path / "results.db"))
+        result = client.calculate(Request({"a": 1, "b": [1, 2]}), refresh=refresh)
+        assert result == mock_result
+
+    assert len(httpserver.log) == (3 if refresh else 1)
+
+
+def test_result_key_is_canonical():
+    assert ResultCache.key("server", {"a": 1, "b": {"c": 2, "d": 3}}) == (
+        ResultCache.key("server", {"b": {"d": 3, "c": 2}, "a": 1})
+    )
+    keys = {
+        ResultCache.key("server", {"a": 1}),
+        ResultCache.key("other_server", {"a": 1}),
+        ResultCache.key("server", {"a": 2}),
+    }
+    assert len(keys) == 3
+
+
+def test_result_eviction_removes_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "results.db", max_size=10**6)
+    for index in range(3):
+        cache.put(f"key{index}", {"value": index})
+    # Using key0 makes key1 the least recently used entry
+    assert cache.get("key0") == {"value": 0}
+
+    cache.max_size = 2 * len('{"value": 0}')
+    cache.put("key3", {"value": 3})
+
+    assert cache.get("key1") is None
+    assert cache.get("key2") is None
+    assert cache.get("key0") == {"value": 0}
+    assert cache.get("key3") == {"value": 3}
+
+
+def test_result_cache_from_config(tmp_path):
+    assert result_cache(minimal_config()) is None
+    cache = result_cache(
+        minimal_config(
+            **{
+                "result-cache": str(tmp_path / "results.db"),
+                "result-cache-max-size": 10,
+            }
+        )
+    )
+    assert cache.path == tmp_path / "results.db"
+    assert cache.max_size == 10
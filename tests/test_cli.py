@@ -1,15 +1,24 @@
+import gzip
 import json
 import os
 import shutil
+import stat
+from datetime import datetime
 from pathlib import Path
 from unittest import mock
 
 import pytest
 from click.testing import CliRunner
+from pydantic import ValidationError
+from resdata.summary import Summary
 
 import stea
 from stea import SteaKeys, SteaResult
-from stea.fm_stea.fm_stea import main_entry_point
+from stea.fm_stea.fm_stea import _write_result, cli, main_entry_point  # noqa: PLC2701
+from stea.stea_cache import FILE_MODE
+from stea.stea_timings import SUMMARY_LOAD
+
+from .conftest import profile_request
 
 TEST_STEA_PATH = Path(__file__).resolve().parent
 
@@ -24,7 +33,12 @@ def fixture_setup_stea(tmpdir):
     os.chdir(cwd)
 
 
-def calculate_patch(stea_input):
+def calculate_patch(config, timings=None, *, refresh=False):  # noqa: ARG001
+    with timings.phase(SUMMARY_LOAD):
+        stea_input = stea.SteaInput.from_config(config)
+    project = stea.SteaClient(stea_input.stea_server).get_project(
+        stea_input.project_id, stea_input.project_version, stea_input.config_date
+    )
     return SteaResult(
         {
             SteaKeys.KEY_VALUES: [
@@ -32,6 +46,7 @@ def calculate_patch(stea_input):
             ]
         },
         stea_input,
+        project=project,
     )
 
 
@@ -55,7 +70,7 @@ def mock_project(monkeypatch):
 def fixture_mock_calculate(monkeypatch):
     mock_stea = mock.MagicMock()
     mock_stea.side_effect = calculate_patch
-    monkeypatch.setattr(stea, "calculate", mock_stea)
+    monkeypatch.setattr(stea, "calculate_from_config", mock_stea)
     return mock_stea
 
 
@@ -84,6 +99,48 @@ def test_stea_response():
     assert result == expected_result
 
 
+@pytest.mark.usefixtures("setup_stea")
+def test_stea_response_reuses_calculated_project(mock_project):
+    runner = CliRunner()
+    result = runner.invoke(main_entry_point, ["-c", "stea_input.yml"])
+    assert result.exit_code == 0
+    mock_project.assert_called_once()
+
+
+@pytest.mark.usefixtures("setup_stea")
+def test_failing_timings_write_keeps_the_error():
+    result = CliRunner().invoke(
+        cli, ["-c", "stea_input.yml", "-r", "nodir/response.json"]
+    )
+    assert result.exit_code == 1
+    assert "Error: [Errno 2] No such file or directory" in result.output
+    assert "Could not write the timings to nodir/stea_timings.json" in result.output
+
+
+@pytest.mark.usefixtures("setup_stea")
+def test_stea_writes_timings():
+    runner = CliRunner()
+    result = runner.invoke(main_entry_point, ["-c", "stea_input.yml"])
+    assert result.exit_code == 0
+    with Path("stea_timings.json").open(encoding="utf-8") as fin:
+        timings = json.load(fin)
+    assert {"config", "summary_load", "write_response"} <= set(timings["phases"])
+    assert timings["total"] >= sum(timings["phases"].values())
+
+
+@pytest.mark.usefixtures("setup_stea")
+def test_stea_writes_timings_on_failure():
+    runner = CliRunner()
+    result = runner.invoke(
+        main_entry_point, ["-c", "stea_input.yml", "--ecl_case", "custom_ecl_case"]
+    )
+    assert result.exit_code == 1
+    with Path("stea_timings.json").open(encoding="utf-8") as fin:
+        timings = json.load(fin)
+    assert "config" in timings["phases"]
+    assert "write_response" not in timings["phases"]
+
+
 @pytest.mark.usefixtures("setup_stea")
 def test_stea_ecl_case_overwrite():
     """
@@ -120,3 +177,208 @@ def test_stea_default_ert_args():
         ],
     )
     assert result.exit_code == 0
+
+
+def write_case(case):
+    Path(case).parent.mkdir(parents=True)
+    summary = Summary.writer(case, datetime(2000, 1, 1), 10, 10, 10)
+    summary.add_variable("FOPT", unit="SM3")
+    for step in range(10):
+        summary.add_t_step(1, sim_days=10 * step)["FOPT"] = step
+    summary.fwrite()
+
+
+@pytest.mark.usefixtures("setup_stea")
+@pytest.mark.parametrize(("case", "absolute"), [("CASE", False), ("case", True)])
+def test_stea_batch(monkeypatch, mock_project, case, absolute):
+    mocked_calculate = mock.MagicMock(
+        return_value={
+            SteaKeys.KEY_VALUES: [
+                {SteaKeys.TAX_MODE: SteaKeys.CORPORATE, SteaKeys.VALUES: {"NPV": 30}}
+            ]
+        }
+    )
+    monkeypatch.setattr(stea.SteaClient, "calculate", mocked_calculate)
+    num_realizations = 3
+    for real in range(num_realizations):
+        write_case(f"realization-{real}/iter-0/eclipse/model/{case}")
+    mock_project.return_value = stea.SteaProject(
+        {
+            SteaKeys.PROJECT_ID: 1,
+            SteaKeys.PROJECT_VERSION: 1,
+            SteaKeys.PROFILES: [
+                {SteaKeys.PROFILE_ID: "a_very_long_string", SteaKeys.UNIT: "Sm3"}
+            ],
+        }
+    )
+    Path("stea_input.yml").write_text(
+        "project-id: 1\n"
+        "project-version: 1\n"
+        "config-date: 2018-07-01\n"
+        "ecl-profiles: {a_very_long_string: {ecl-key: FOPT}}\n"
+        "results: [NPV]\n"
+        "production-cache: stea_production.json\n",
+        encoding="utf-8",
+    )
+    cases = f"realization-*/iter-0/eclipse/model/{case}"
+    if absolute:
+        cases = str(Path.cwd() / cases)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "batch",
+            "-c",
+            "stea_input.yml",
+            "--cases",
+            cases,
+            "--jobs",
+            "2",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    mock_project.assert_called_once()
+    assert mocked_calculate.call_count == num_realizations
+    for real in range(num_realizations):
+        runpath = Path(f"realization-{real}/iter-0")
+        assert (runpath / "NPV_0").read_text(encoding="utf-8") == "30\n"
+        assert (runpath / "stea_response.json").exists()
+        assert (runpath / "stea_production.json").exists()
+    assert not Path("stea_production.json").exists()
+
+
+@pytest.mark.usefixtures("setup_stea")
+def test_stea_batch_without_cases():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["batch", "-c", "stea_input.yml", "--cases", "no-such-case"]
+    )
+    assert result.exit_code == 1
+    assert "No summary cases matching: no-such-case" in result.output
+
+
+@pytest.mark.usefixtures("setup_stea")
+def test_cli_runs_single_calculation_by_default():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["-c", "stea_input.yml"])
+    assert result.exit_code == 0
+    assert Path("NPV_0").exists()
+
+
+def result_for(**config):
+    stea_input = stea.SteaInput.from_config(
+        stea.SteaConfig(
+            config_date=datetime(2018, 7, 1),
+            project_id=1,
+            project_version=1,
+            ecl_profiles={"a": {"ecl_key": "FOPT"}},
+            results=["NPV"],
+            **config,
+        )
+    )
+    project = stea.SteaProject(
+        {
+            SteaKeys.PROJECT_ID: 1,
+            SteaKeys.PROJECT_VERSION: 1,
+            SteaKeys.PROFILES: [{SteaKeys.PROFILE_ID: "a"}, {SteaKeys.PROFILE_ID: "b"}],
+        }
+    )
+    data = {
+        SteaKeys.KEY_VALUES: [
+            {SteaKeys.TAX_MODE: SteaKeys.CORPORATE, SteaKeys.VALUES: {"NPV": 30}}
+        ]
+    }
+    return SteaResult(
+        data, stea_input, project=project, request=profile_request([1.0, 2.0], "a")
+    )
+
+
+@pytest.mark.parametrize(
+    ("selection", "expected"),
+    [("all", {"a", "b"}), ("adjusted", {"a"}), ("none", set())],
+)
+def test_response_profiles(tmp_path, selection, expected):
+    _write_result(result_for(response_profiles=selection), tmp_path, "response.json")
+    response = json.loads((tmp_path / "response.json").read_text(encoding="utf-8"))
+    assert set(response["profiles"]) == expected
+
+
+def test_compact_gzipped_response(tmp_path):
+    _write_result(
+        result_for(response_compact=True, response_gzip=True),
+        tmp_path,
+        "response.json",
+    )
+    assert not (tmp_path / "response.json").exists()
+    with gzip.open(tmp_path / "response.json.gz", "rt", encoding="utf-8") as fin:
+        text = fin.read()
+    assert " " not in text
+    assert json.loads(text)["response"][0][SteaKeys.VALUES] == {"NPV": 30}
+
+
+def test_profile_catalogue_is_shared(tmp_path):
+    catalogue = tmp_path / "catalogue"
+    for realization in range(2):
+        runpath = tmp_path / f"realization-{realization}"
+        runpath.mkdir()
+        _write_result(
+            result_for(profile_catalogue=str(catalogue)),
+            runpath,
+            "response.json",
+        )
+
+    (catalogue_file,) = catalogue.iterdir()
+    assert set(json.loads(catalogue_file.read_text(encoding="utf-8"))) == {"a", "b"}
+    assert stat.S_IMODE(catalogue_file.stat().st_mode) == FILE_MODE
+    for realization in range(2):
+        response = json.loads(
+            (tmp_path / f"realization-{realization}" / "response.json").read_text(
+                encoding="utf-8"
+            )
+        )
+        assert response["profile_catalogue"] == str(catalogue_file)
+        assert response["profiles"] == {}
+
+
+def test_profile_catalogue_rejects_all_profiles(tmp_path):
+    with pytest.raises(ValidationError, match="response-profiles must be adjusted"):
+        result_for(profile_catalogue=str(tmp_path), response_profiles="all")
+
+
+def test_aggregate_records(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    for realization in range(3):
+        runpath = tmp_path / f"realization-{realization}" / "iter-0"
+        runpath.mkdir(parents=True)
+        _write_result(
+            result_for(record_file="stea_record.json"), runpath, "response.json"
+        )
+
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(
+        cli,
+        ["aggregate", "--records", "realization-*/iter-0/stea_record.json"],
+    )
+    assert result.exit_code == 0, result.output
+    result = CliRunner().invoke(
+        cli,
+        ["aggregate", "--records", f"{tmp_path}/realization-*/iter-0/stea_record.json"],
+    )
+    assert result.exit_code == 0, result.output
+
+    values = pq.read_table("stea_results/values.parquet").to_pydict()
+    assert values["realization"] == [0, 1, 2]
+    assert values["value"] == [30.0] * 3
+    assert values["tax_mode"] == [SteaKeys.CORPORATE] * 3
+    profiles = pq.read_table("stea_results/profiles.parquet").to_pydict()
+    assert profiles["realization"] == [0, 0, 1, 1, 2, 2]
+    assert profiles["year"] == [2020, 2021] * 3
+
+
+def test_aggregate_without_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = CliRunner().invoke(cli, ["aggregate", "--records", "*.json"])
+    assert result.exit_code == 1
+    assert "No record files matching" in result.output
@@ -0,0 +1,358 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from werkzeug import Response
+
+from stea import AsyncSteaClient, SteaClient, SteaKeys
+from stea.single_flight import SingleFlight
+from stea.stea_async_client import retry_after
+from stea.stea_timings import Timings
+
+from .conftest import CONFIG_DATE, PROJECT, PROJECT_URL, Request, minimal_config
+
+# ruff: noqa: PLR2004
+
+
+def client_for(httpserver, **kwargs):
+    return SteaClient(httpserver.url_for("").rstrip("/"), backoff_factor=0, **kwargs)
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_get_project_retries_busy_server(httpserver, status):
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_data("", status=status)
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_json(PROJECT)
+
+    project = client_for(httpserver).get_project(1234, 1, CONFIG_DATE)
+
+    assert project.has_profile("ID1")
+    httpserver.check_assertions()
+
+
+def test_calculate_retries_busy_server(httpserver, mock_result):
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_response(Response("", status=503, headers={"Retry-After": "0"}))
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_json(mock_result)
+
+    assert client_for(httpserver).calculate(Request()) == mock_result
+    httpserver.check_assertions()
+
+
+def test_retries_are_exhausted(httpserver):
+    httpserver.expect_request(PROJECT_URL).respond_with_data("busy", status=503)
+
+    with pytest.raises(RuntimeError, match=r"HTTP GET from .* failed"):
+        client_for(httpserver, retries=2).get_project(1234, 1, CONFIG_DATE)
+
+    assert len(httpserver.log) == 3
+
+
+def test_client_errors_are_not_retried(httpserver):
+    httpserver.expect_request(PROJECT_URL).respond_with_data("missing", status=404)
+
+    with pytest.raises(RuntimeError, match=r"HTTP GET from .* failed"):
+        client_for(httpserver).get_project(1234, 1, CONFIG_DATE)
+
+    assert len(httpserver.log) == 1
+
+
+def test_timings_record_http_requests(httpserver, mock_result):
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_data("", status=503)
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_json(PROJECT)
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_json(mock_result)
+
+    timings = Timings()
+    client = client_for(httpserver, timings=timings)
+    client.get_project(1234, 1, CONFIG_DATE)
+    client.calculate(Request({"payload": 1}))
+
+    get, post = timings.http
+    assert (get["method"], get["status"], get["retries"]) == ("GET", 200, 1)
+    assert get["bytes_sent"] == 0
+    assert get["bytes_received"] > 0
+    assert (post["method"], post["status"], post["retries"]) == ("POST", 200, 0)
+    assert post["bytes_sent"] == len(json.dumps({"payload": 1}))
+    assert all(request["elapsed"] > 0 for request in timings.http)
+
+
+def slow_first_handler(data, delay):
+    """A handler responding with data, after delay seconds for the first
+    request only, and the list of requests it has handled."""
+    calls = []
+
+    def handler(_):
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(delay)
+        return Response(json.dumps(data), content_type="application/json")
+
+    return handler, calls
+
+
+def test_calculate_read_timeout_is_not_retried(httpserver, mock_result):
+    handler, calls = slow_first_handler(mock_result, 0.5)
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_handler(
+        handler
+    )
+
+    with pytest.raises(RuntimeError, match=r"HTTP POST to .* failed"):
+        client_for(httpserver, read_timeout=0.2).calculate(Request())
+
+    time.sleep(0.5)
+    assert len(calls) == 1
+
+
+def test_get_project_read_timeout_is_retried(httpserver):
+    handler, calls = slow_first_handler(PROJECT, 0.5)
+    httpserver.expect_request(PROJECT_URL).respond_with_handler(handler)
+
+    project = client_for(httpserver, read_timeout=0.2).get_project(1234, 1, CONFIG_DATE)
+
+    assert project.has_profile("ID1")
+    assert len(calls) > 1
+
+
+def compressed_json_handler(expected, result):
+    """A handler checking that the request body is the gzipped expected
+    json, and responding with the gzipped result."""
+
+    def handler(request):
+        assert request.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(request.get_data())) == expected
+        return Response(
+            gzip.compress(json.dumps(result).encode("utf-8")),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    return handler
+
+
+def test_compressed_calculate(httpserver, mock_result):
+    request = Request({"payload": list(range(1000))})
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_handler(compressed_json_handler(request.data(), mock_result))
+
+    timings = Timings()
+    client = client_for(httpserver, compression="gzip", timings=timings)
+
+    assert client.calculate(request) == mock_result
+    assert timings.http[0]["bytes_sent"] < len(json.dumps(request.data()))
+    httpserver.check_assertions()
+
+
+def test_compressed_project_response(httpserver):
+    body = gzip.compress(json.dumps(PROJECT).encode("utf-8"))
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_response(
+        Response(
+            body,
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+    )
+
+    timings = Timings()
+    project = client_for(httpserver, timings=timings).get_project(1234, 1, CONFIG_DATE)
+
+    assert project.has_profile("ID1")
+    assert "gzip" in httpserver.log[0][0].headers["Accept-Encoding"]
+    assert timings.http[0]["bytes_received"] == len(body)
+
+
+def slow_json_handler(data):
+    def handler(_):
+        time.sleep(0.2)
+        return Response(json.dumps(data), content_type="application/json")
+
+    return handler
+
+
+def test_concurrent_identical_calculations_are_posted_once(httpserver, mock_result):
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_handler(
+        slow_json_handler(mock_result)
+    )
+
+    def calculate(value):
+        return client_for(httpserver).calculate(Request({"payload": value}))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(calculate, [1] * 6 + [2] * 2))
+
+    assert results == [mock_result] * 8
+    assert len(httpserver.log) == 2
+
+
+def test_concurrent_project_gets_are_coalesced(httpserver):
+    httpserver.expect_request(PROJECT_URL).respond_with_handler(
+        slow_json_handler(PROJECT)
+    )
+    client = client_for(httpserver)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        projects = list(
+            pool.map(lambda _: client.get_project(1234, 1, CONFIG_DATE), range(4))
+        )
+
+    assert all(project.has_profile("ID1") for project in projects)
+    assert len(httpserver.log) == 1
+
+    client.get_project(1234, 1, CONFIG_DATE)
+    assert len(httpserver.log) == 2
+
+
+def test_single_flight_shares_exceptions():
+    flight = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        msg = "server down"
+        raise RuntimeError(msg)
+
+    def call(_):
+        try:
+            flight.do("key", fail)
+        except RuntimeError as err:
+            return str(err)
+        return None
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(call, range(4))) == ["server down"] * 4
+    assert len(calls) == 1
+
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_client_from_config():
+    config = minimal_config(
+        **{
+            "connect-timeout": 1,
+            "read-timeout": 2,
+            "retries": 5,
+            "pool-size": 20,
+            "compression": "deflate",
+        },
+    )
+    client = SteaClient.from_config(config)
+
+    assert client.server == SteaKeys.PRODUCTION_SERVER
+    assert client.timeout == (1, 2)
+    adapter = client.session.get_adapter(SteaKeys.PRODUCTION_SERVER)
+    assert adapter.max_retries.total == 5
+    assert adapter._pool_maxsize == 20  # noqa: SLF001
+    assert client.compression == "deflate"
+
+
+def async_client_for(httpserver, **kwargs):
+    return AsyncSteaClient(
+        httpserver.url_for("").rstrip("/"), backoff_factor=0, **kwargs
+    )
+
+
+def test_async_get_project_retries_busy_server(httpserver):
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_response(
+        Response("", status=429, headers={"Retry-After": "0"})
+    )
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_json(PROJECT)
+
+    async def get_project():
+        async with async_client_for(httpserver) as client:
+            return await client.get_project(1234, 1, CONFIG_DATE)
+
+    project = asyncio.run(get_project())
+
+    assert project.has_profile("ID1")
+    httpserver.check_assertions()
+
+
+def test_async_retries_are_exhausted(httpserver):
+    httpserver.expect_request(PROJECT_URL).respond_with_data("busy", status=503)
+
+    async def get_project():
+        async with async_client_for(httpserver, retries=2) as client:
+            return await client.get_project(1234, 1, CONFIG_DATE)
+
+    with pytest.raises(RuntimeError, match=r"HTTP GET from .* failed"):
+        asyncio.run(get_project())
+
+    assert len(httpserver.log) == 3
+
+
+def test_async_calculate_read_timeout_is_not_retried(httpserver, mock_result):
+    handler, calls = slow_first_handler(mock_result, 0.5)
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_handler(
+        handler
+    )
+
+    async def calculate():
+        async with async_client_for(httpserver, read_timeout=0.2) as client:
+            return await client.calculate(Request())
+
+    with pytest.raises(RuntimeError, match=r"HTTP POST to .* failed"):
+        asyncio.run(calculate())
+
+    time.sleep(0.5)
+    assert len(calls) == 1
+
+
+def test_async_compressed_calculate(httpserver, mock_result):
+    request = Request({"payload": 1})
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_handler(compressed_json_handler(request.data(), mock_result))
+
+    async def calculate():
+        async with async_client_for(httpserver, compression="gzip") as client:
+            return await client.calculate(request)
+
+    assert asyncio.run(calculate()) == mock_result
+    httpserver.check_assertions()
+
+
+def test_async_calculate_bounds_concurrency(httpserver, mock_result):
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def handler(_):
+        with lock:
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        return Response(json.dumps(mock_result), content_type="application/json")
+
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_handler(
+        handler
+    )
+
+    async def calculate_all():
+        async with async_client_for(httpserver, max_concurrency=2) as client:
+            return await asyncio.gather(
+                *(client.calculate(Request()) for _ in range(6))
+            )
+
+    assert asyncio.run(calculate_all()) == [mock_result] * 6
+    assert max(max_in_flight) <= 2
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [(None, None), ("3", 3.0), ("-1", 0.0), ("not a date", None)],
+)
+def test_retry_after(header, expected):
+    headers = {} if header is None else {"Retry-After": header}
+    assert retry_after(httpx.Response(503, headers=headers)) == expected
@@ -6,7 +6,7 @@ from unittest.mock import MagicMock
 import pytest
 import yaml
 
-from stea import SteaConfig, stea_input
+from stea import SteaConfig, stea_input, summary_index
 
 
 @pytest.fixture
@@ -42,7 +42,7 @@ def test_minimal_config(ecl_case, monkeypatch, config_date):
     }
 
     summary = MagicMock()
-    monkeypatch.setattr(stea_input, "Summary", summary)
+    monkeypatch.setattr(summary_index, "Summary", summary)
 
     with Path("config_file.yml").open("w", encoding="utf-8") as fout:
         yaml.dump(valid_config, fout)
@@ -69,7 +69,7 @@ def test_invalid_config(required_key, monkeypatch):
     invalid_dict = remove_key(valid_dict, required_key)
 
     summary = MagicMock()
-    monkeypatch.setattr(stea_input, "Summary", summary)
+    monkeypatch.setattr(summary_index, "Summary", summary)
 
     Path("config_file.yml").write_text(yaml.dump(invalid_dict), encoding="utf-8")
 
@@ -100,7 +100,7 @@ def test_overwrite_ecl_case(tmp_path, monkeypatch, ecl_case):
         ecl_case: "case",
     }
     summary = MagicMock()
-    monkeypatch.setattr(stea_input, "Summary", summary)
+    monkeypatch.setattr(summary_index, "Summary", summary)
 
     Path("config_file.yml").write_text(yaml.dump(valid_config), encoding="utf-8")
     config = stea_input.SteaInput("config_file.yml", "another_case").config
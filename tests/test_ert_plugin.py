@@ -1,19 +1,19 @@
 from ert.plugins.plugin_manager import ErtPluginManager
 
-import stea.fm_stea.fm_stea
+import stea.fm_stea.ert_plugin
 
 
 def test_that_stea_hook_is_installed_in_ertpluginmanager() -> None:
     plugin_manager = ErtPluginManager(
         plugins=[
-            stea.fm_stea.fm_stea,
+            stea.fm_stea.ert_plugin,
         ]
     )
     assert plugin_manager.forward_model_steps[0]().name == "STEA"
 
 
 def test_that_steaplugin_has_docs():
-    plugin_manager = ErtPluginManager(plugins=[stea.fm_stea.fm_stea])
+    plugin_manager = ErtPluginManager(plugins=[stea.fm_stea.ert_plugin])
 
     docs = plugin_manager.forward_model_steps[0]().documentation()
     assert docs is not None
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+
+from stea import SteaClient, SteaKeys
+from stea.stea_client import date_string
+from stea.testing import FakeSteaServer
+
+from .conftest import CONFIG_DATE, PROJECT, profile_request
+
+# ruff: noqa: PLR2004
+
+
+def calculation(data):
+    return profile_request(
+        data,
+        start_year=CONFIG_DATE.year,
+        **{
+            SteaKeys.PROJECT_ID: 1234,
+            SteaKeys.PROJECT_VERSION: 1,
+            SteaKeys.CONFIG_DATE: date_string(CONFIG_DATE),
+            SteaKeys.RESULTS: ["NPV", "IRR"],
+        },
+    )
+
+
+def test_project_and_calculation():
+    with FakeSteaServer(PROJECT, discount_rate=0.1, tax_rate=0.5) as server:
+        client = SteaClient(server.url, compression="gzip")
+        project = client.get_project(1234, 1, CONFIG_DATE)
+        result = client.calculate(calculation([100.0, 110.0]))
+
+    assert project.has_profile("ID1")
+    pretax, corporate = result[SteaKeys.KEY_VALUES]
+    assert pretax[SteaKeys.VALUES]["NPV"] == pytest.approx(200.0)
+    assert pretax[SteaKeys.VALUES]["IRR"] == pytest.approx(210.0)
+    assert corporate[SteaKeys.TAX_MODE] == SteaKeys.CORPORATE
+    assert corporate[SteaKeys.VALUES]["NPV"] == pytest.approx(100.0)
+
+
+def test_unknown_project():
+    with FakeSteaServer(PROJECT) as server:
+        client = SteaClient(server.url)
+        with pytest.raises(RuntimeError, match=r"HTTP GET from .* failed"):
+            client.get_project(4321, 1, CONFIG_DATE)
+        assert server.count("GET", HTTPStatus.NOT_FOUND) == 1
+
+
+def test_throttled_requests_are_retried():
+    with FakeSteaServer(PROJECT, latency=0.1, max_in_flight=1) as server:
+        client = SteaClient(server.url, retries=10, backoff_factor=0.05)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(
+                pool.map(lambda value: client.calculate(calculation([value])), range(4))
+            )
+
+        assert [result[SteaKeys.KEY_VALUES][0][SteaKeys.VALUES] for result in results]
+        assert server.count("POST") == 4
+        assert server.count("POST", HTTPStatus.TOO_MANY_REQUESTS) > 0
+
+
+def test_errors_exhaust_retries():
+    with FakeSteaServer(PROJECT, error_rate=1.0) as server:
+        client = SteaClient(server.url, retries=2, backoff_factor=0)
+        with pytest.raises(RuntimeError, match=r"HTTP POST to .* failed"):
+            client.calculate(calculation([1.0]))
+        assert server.count("POST", HTTPStatus.INTERNAL_SERVER_ERROR) == 3
@@ -0,0 +1,54 @@
+"""The forward model is run thousands of times per study, so the command line
+client must not import heavy dependencies before they are needed."""
+
+import subprocess
+import sys
+
+import pytest
+
+import stea
+
+# Generous compared to the ~30 ms measured locally, importing ert alone took
+# several seconds.
+IMPORT_TIME_BUDGET_US = 500_000
+
+
+def import_times(module):
+    """Cumulative import time in microseconds of all modules imported when
+    importing module, as reported by python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module", name="cli_import_times")
+def fixture_cli_import_times():
+    return import_times("stea.fm_stea.fm_stea")
+
+
+def test_cli_import_time_budget(cli_import_times):
+    assert cli_import_times["stea.fm_stea.fm_stea"] < IMPORT_TIME_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "heavy_module", ["ert", "httpx", "numpy", "pydantic", "requests", "resdata"]
+)
+def test_cli_does_not_import_heavy_modules(cli_import_times, heavy_module):
+    assert heavy_module not in cli_import_times
+
+
+def test_lazy_attributes():
+    assert "SteaClient" in dir(stea)
+    assert stea.SteaClient.__name__ == "SteaClient"
+    with pytest.raises(AttributeError, match="has no attribute 'NoSuchClass'"):
+        _ = stea.NoSuchClass
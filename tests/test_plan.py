@@ -0,0 +1,164 @@
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+from resdata.summary import Summary
+
+from stea import SteaConfig, SteaInput, SteaInputKeys, SteaKeys, make_request
+from stea.fm_stea.fm_stea import cli
+from stea.plan import (
+    PLAN_VERSION,
+    PlanInput,
+    compile_plan,
+    load_plan,
+    plan_request,
+    write_plan,
+)
+from stea.stea_project import SteaProject
+from stea.testing import FakeSteaServer
+
+PROJECT = {
+    SteaKeys.PROJECT_ID: 1234,
+    SteaKeys.PROJECT_VERSION: 1,
+    SteaKeys.PROFILES: [
+        {
+            SteaKeys.PROFILE_ID: "ID1",
+            SteaKeys.UNIT: "Bbl",
+            SteaKeys.MULTIPLE: "Mill",
+            SteaInputKeys.PROFILE_KEY: "Oil",
+        },
+        {
+            SteaKeys.PROFILE_ID: "ID2",
+            SteaKeys.UNIT: "Sm3",
+            SteaInputKeys.PROFILE_KEY: "Oil",
+        },
+        {SteaKeys.PROFILE_ID: "ID3", SteaKeys.UNIT: "Sm3"},
+    ],
+}
+
+CONFIG = {
+    "config-date": datetime(2018, 10, 10, 12, 0, 0),
+    "project-id": 1234,
+    "project-version": 1,
+    "ecl-profiles": {
+        "Oil": {"ecl-key": "FOPT", "mult": [2, 0.5]},
+        "ID3": {"ecl-key": "FGPT", "start-date": "2000-03-15", "glob_mult": 1.5},
+    },
+    "profiles": {"ID3": {"start-year": 2001, "data": [1, 2, 3]}},
+    "results": ["NPV"],
+    "ecl-case": "CASE",
+}
+
+
+def write_case(case):
+    summary = Summary.writer(case, datetime(2000, 1, 1), 10, 10, 10)
+    summary.add_variable("FOPT", unit="SM3")
+    summary.add_variable("FGPT", unit="SM3")
+    for step in range(100):
+        t_step = summary.add_t_step(1, sim_days=10 * step)
+        t_step["FOPT"] = 10 * step
+        t_step["FGPT"] = 100 * step
+    summary.fwrite()
+
+
+@pytest.fixture(name="case")
+def fixture_case(tmpdir):
+    with tmpdir.as_cwd():
+        write_case("CASE")
+        yield
+
+
+@pytest.mark.usefixtures("case")
+def test_plan_request_matches_make_request():
+    config = SteaConfig(**CONFIG)
+    project = SteaProject(PROJECT)
+    write_plan(compile_plan(config, project), "stea_plan.json")
+    plan = load_plan("stea_plan.json")
+
+    assert plan["conversions"]["ID1"] == ["Bbl", {"SM3": pytest.approx(6.2898)}, 1e-6]
+    request = plan_request(plan, PlanInput(plan["config"]), project)
+    expected = make_request(SteaInput.from_config(config), project)
+
+    assert request.data() == expected.data()
+    assert [
+        profile[SteaKeys.PROFILE_ID]
+        for profile in request.data()[SteaKeys.ADJUSTMENTS][SteaKeys.PROFILES]
+    ] == ["ID1", "ID2", "ID3", "ID3"]
+
+
+def test_compile_checks_profiles():
+    config = SteaConfig(**{**CONFIG, "ecl-profiles": {"Gas": {"ecl-key": "FGPT"}}})
+    with pytest.raises(KeyError, match="No profiles with id or description Gas"):
+        compile_plan(config, SteaProject(PROJECT))
+
+
+@pytest.mark.usefixtures("case")
+def test_plan_version_is_checked():
+    plan = compile_plan(SteaConfig(**CONFIG), SteaProject(PROJECT))
+    write_plan({**plan, "version": PLAN_VERSION + 1}, "stea_plan.json")
+    with pytest.raises(ValueError, match="compile it again"):
+        load_plan("stea_plan.json")
+
+
+@pytest.mark.usefixtures("case")
+def test_run_plan_needs_no_yaml_pydantic_or_project():
+    with FakeSteaServer(PROJECT) as server:
+        config = SteaConfig(**CONFIG, **{"stea-server": server.url})
+        write_plan(compile_plan(config, SteaProject(PROJECT)), "stea_plan.json")
+        write_case("OTHER")
+
+        script = (
+            "import json, sys\n"
+            "from stea.plan import load_plan, run_plan\n"
+            "result = run_plan(load_plan('stea_plan.json'), 'OTHER')\n"
+            "modules = [name for name in ('yaml', 'pydantic') if name in sys.modules]\n"
+            "print(json.dumps([result.results('Corporate'), modules]))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        ).stdout
+
+        assert server.count("GET") == 0
+        assert server.count("POST") == 1
+    results, modules = json.loads(output)
+    assert results["NPV"] > 0
+    assert modules == []
+
+
+@pytest.mark.usefixtures("case")
+def test_compile_and_run_plan_commands():
+    with FakeSteaServer(PROJECT) as server:
+        Path("stea_input.yml").write_text(
+            yaml.dump({**CONFIG, "stea-server": server.url}), encoding="utf-8"
+        )
+        runner = CliRunner()
+        result = runner.invoke(cli, ["compile", "-c", "stea_input.yml"])
+        assert result.exit_code == 0, result.output
+        result = runner.invoke(cli, ["run-plan", "-p", "stea_plan.json"])
+        assert result.exit_code == 0, result.output
+
+        assert server.count("GET") == 1
+        assert server.count("POST") == 1
+    assert float(Path("NPV_0").read_text(encoding="utf-8")) > 0
+    with Path("stea_response.json").open(encoding="utf-8") as fin:
+        assert set(json.load(fin)["profiles"]) == {"ID1", "ID2", "ID3"}
+    with Path("stea_timings.json").open(encoding="utf-8") as fin:
+        assert "project_get" not in json.load(fin)["phases"]
+
+
+@pytest.mark.usefixtures("case")
+def test_run_plan_failing_timings_write_keeps_the_error():
+    with FakeSteaServer(PROJECT) as server:
+        config = SteaConfig(**CONFIG, **{"stea-server": server.url})
+        write_plan(compile_plan(config, SteaProject(PROJECT)), "plan.json")
+        result = CliRunner().invoke(
+            cli, ["run-plan", "-p", "plan.json", "-r", "nodir/response.json"]
+        )
+    assert result.exit_code == 1
+    assert "Error: [Errno 2] No such file or directory" in result.output
+    assert "Could not write the timings to nodir/stea_timings.json" in result.output
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+import pytest
+
+from stea import SteaClient
+from stea.rate_limit import RATE_LIMIT_DIR, AdaptiveConcurrency, TokenBucket
+
+from .conftest import CONFIG_DATE, PROJECT, PROJECT_URL, minimal_config
+
+# ruff: noqa: PLR2004
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(20, burst=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # Two requests in the burst, then one every 50 ms
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_token_bucket_file_is_shared(tmp_path):
+    path = tmp_path / "bucket"
+    first = TokenBucket(5, burst=2, path=path)
+    second = TokenBucket(5, burst=2, path=path)
+
+    start = time.perf_counter()
+    first.acquire()
+    first.acquire()
+    assert time.perf_counter() - start < 0.1
+    second.acquire()
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_token_bucket_file_is_created_readable_by_others(tmp_path):
+    path = tmp_path / "bucket"
+    TokenBucket(5, path=path).acquire()
+    assert path.stat().st_mode & 0o044 == 0o044 & ~get_umask()
+
+
+def test_token_bucket_falls_back_to_process(tmp_path):
+    # A directory can not be opened as the bucket file
+    bucket = TokenBucket(20, burst=2, path=tmp_path)
+
+    start = time.perf_counter()
+    with pytest.warns(UserWarning, match="only the requests of this process"):
+        bucket.acquire()
+    for _ in range(3):
+        bucket.acquire()
+    assert bucket.path is None
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_adaptive_concurrency_increases_additively():
+    concurrency = AdaptiveConcurrency(10, initial=2)
+    for _ in range(4):
+        concurrency.acquire()
+        concurrency.release(0.1)
+    assert 3 < concurrency.limit < 4
+
+
+def test_adaptive_concurrency_decreases_once_per_window():
+    concurrency = AdaptiveConcurrency(8)
+    for _ in range(4):
+        concurrency.acquire()
+    # All four requests were in flight when the first one was throttled
+    for _ in range(4):
+        concurrency.release(0.1, congested=True)
+    assert concurrency.limit == 4
+
+    time.sleep(0.02)
+    concurrency.acquire()
+    concurrency.release(0.01, congested=True)
+    assert concurrency.limit == 2
+
+
+def test_adaptive_concurrency_decreases_on_latency_growth():
+    concurrency = AdaptiveConcurrency(8, latency_factor=2.0)
+    concurrency.acquire()
+    concurrency.release(0.001)
+    time.sleep(0.01)
+    concurrency.acquire()
+    concurrency.release(0.005)
+    assert concurrency.limit == 4
+
+
+def test_adaptive_concurrency_bounds_requests_in_flight():
+    concurrency = AdaptiveConcurrency(2)
+    concurrency.acquire()
+    concurrency.acquire()
+    acquired = threading.Event()
+
+    def acquire():
+        concurrency.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.1)
+    concurrency.release(0.1)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_client_backs_off_when_throttled(httpserver):
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_data("", status=503)
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_json(PROJECT)
+    concurrency = AdaptiveConcurrency(4)
+    client = SteaClient(
+        httpserver.url_for("").rstrip("/"),
+        backoff_factor=0,
+        concurrency=concurrency,
+    )
+
+    client.get_project(1234, 1, CONFIG_DATE)
+
+    assert concurrency.limit == 2
+    assert concurrency.in_flight == 0
+
+
+def test_client_rate_limit_from_config():
+    config = minimal_config(
+        **{"rate-limit": 2.5, "rate-limit-burst": 3, "adaptive-concurrency": True},
+    )
+    client = SteaClient.from_config(config)
+
+    assert client.rate_limiter.rate == pytest.approx(2.5)
+    assert client.rate_limiter.burst == 3
+    assert str(os.getuid()) in client.rate_limiter.path.name
+    assert client.rate_limiter.path.parent == RATE_LIMIT_DIR
+    assert client.concurrency.maximum == config.pool_size
+
+
+def test_rate_limit_file_from_config(tmp_path):
+    path = tmp_path / "bucket"
+    config = minimal_config(**{"rate-limit": 1, "rate-limit-file": str(path)})
+    SteaClient.from_config(config).rate_limiter.acquire()
+    assert path.exists()
+
+
+def get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
@@ -1,23 +1,37 @@
+import asyncio
 import datetime
+import json
 import os
+import time
 from contextlib import ExitStack as does_not_raise
 from pathlib import Path
+from unittest import mock
 
 import pytest
 import yaml
 from resdata.summary import Summary
+from werkzeug import Response
 
+import stea
 from stea import (
     SteaClient,
     SteaInput,
     SteaInputKeys,
     SteaKeys,
+    SteaProject,
     SteaRequest,
     SteaResult,
     calculate,
+    calculate_many,
     make_request,
 )
-from stea.stea_request import BARRELS_PR_SM3
+from stea.mapped_summary import MappedSummary
+from stea.stea_request import BARRELS_PR_SM3, EclProfile
+from stea.stea_timings import Timings
+from stea.summary_index import YearlyIndex
+from stea.testing import FakeSteaServer
+
+from .conftest import PROJECT, PROJECT_URL, minimal_config, profile_request
 
 # ruff: noqa: PLR2004
 
@@ -111,6 +125,26 @@ def test_project(mock_project):
     assert mock_project.get_profile_mult("ID2") == "1"
 
 
+def test_find_profiles():
+    project = SteaProject(
+        {
+            SteaKeys.PROFILES: [
+                {SteaKeys.PROFILE_ID: "ID1", SteaInputKeys.PROFILE_KEY: "FOPT"},
+                {SteaKeys.PROFILE_ID: "ID2", SteaInputKeys.PROFILE_KEY: "FGPT"},
+                {SteaKeys.PROFILE_ID: "ID3", SteaInputKeys.PROFILE_KEY: "FOPT"},
+                {SteaKeys.PROFILE_ID: "ID4"},
+            ],
+            SteaKeys.PROJECT_ID: "project-id",
+            SteaKeys.PROJECT_VERSION: "100",
+        }
+    )
+    assert project.find_profiles("ID2") == ["ID2"]
+    assert project.find_profiles("ID4") == ["ID4"]
+    assert project.find_profiles("FOPT") == ["ID1", "ID3"]
+    assert project.find_profiles("FGPT") == ["ID2"]
+    assert project.find_profiles("FWPT") == []
+
+
 @pytest.mark.parametrize(
     ("ecl_unit", "project_unit", "scale_factor", "expected_fopt0"),
     [
@@ -335,6 +369,239 @@ def test_start_year_end_year(
         )
 
 
+def test_add_ecl_profiles_matches_single_profiles(tmpdir, mock_project):
+    os.chdir(tmpdir)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.RESULTS: ["npv"],
+        SteaInputKeys.ECL_CASE: "CSV",
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    create_case().fwrite()
+    stea_input = SteaInput("config_file")
+    profiles = [
+        EclProfile("ID1", "FOPT"),
+        EclProfile("ID2", "FGPT", start_date=datetime.date(2010, 7, 1)),
+        EclProfile("ID1", "FGPT", multiplier=[2, 0.5, 3, 4]),
+        EclProfile("ID2", "FOPT", end_year=2011, global_multiplier=1.5),
+        EclProfile("ID2", "FOPT", start_date=datetime.date(2010, 7, 1)),
+    ]
+
+    batched = SteaRequest(stea_input, mock_project)
+    batched.add_ecl_profiles(profiles)
+    single = SteaRequest(stea_input, mock_project)
+    for profile in profiles:
+        single.add_ecl_profile(*profile)
+
+    batched_profiles = batched.data()["Adjustments"]["Profiles"]
+    single_profiles = single.data()["Adjustments"]["Profiles"]
+    assert [p["Id"] for p in batched_profiles] == [p.profile_id for p in profiles]
+    for batched_profile, single_profile in zip(
+        batched_profiles, single_profiles, strict=True
+    ):
+        assert (
+            batched_profile["Data"]["StartYear"] == single_profile["Data"]["StartYear"]
+        )
+        assert batched_profile["Data"]["Data"] == pytest.approx(
+            single_profile["Data"]["Data"]
+        )
+
+
+def test_repeated_key_and_window_is_extracted_once(tmpdir, mock_project):
+    os.chdir(tmpdir)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.RESULTS: ["npv"],
+        SteaInputKeys.ECL_CASE: "CSV",
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    create_case().fwrite()
+    stea_input = SteaInput("config_file")
+    index = stea_input.summary_index
+    index.production = mock.MagicMock(wraps=index.production)
+
+    request = SteaRequest(stea_input, mock_project)
+    request.add_ecl_profiles(
+        [
+            EclProfile("ID1", "FOPT", global_multiplier=1.1),
+            EclProfile("ID2", "FOPT", multiplier=[1.1, 2, 0]),
+        ]
+    )
+    request.add_ecl_profile("ID1", "FOPT", global_multiplier=2)
+    assert index.production.call_count == 1
+
+    request.add_ecl_profile("ID1", "FOPT", start_date=datetime.date(2010, 7, 1))
+    assert index.production.call_count == 2
+
+    profiles = request.data()["Adjustments"]["Profiles"]
+    assert profiles[2]["Data"]["Data"] == pytest.approx(
+        [value / 1.1 * 2 for value in profiles[0]["Data"]["Data"]]
+    )
+
+
+@pytest.mark.parametrize("summary_reader", ["resdata", "mmap"])
+def test_rate_key_is_rejected(summary_reader, tmpdir, mock_project):
+    os.chdir(tmpdir)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPR"}},
+        SteaInputKeys.RESULTS: ["npv"],
+        SteaInputKeys.ECL_CASE: "CSV",
+        "summary-reader": summary_reader,
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    create_case().fwrite()
+
+    with pytest.raises(TypeError, match=r"one of the TOTAL keys .* not FOPR"):
+        make_request(SteaInput("config_file"), mock_project)
+
+
+def test_production_cache_is_reused_until_case_changes(tmpdir, mock_project):
+    os.chdir(tmpdir)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.RESULTS: ["npv"],
+        SteaInputKeys.ECL_CASE: "CSV",
+        "production-cache": "production.json",
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    create_case().fwrite()
+
+    def build(*profiles):
+        stea_input = SteaInput("config_file")
+        index = stea_input.summary_index
+        index.production = mock.MagicMock(wraps=index.production)
+        request = SteaRequest(stea_input, mock_project)
+        request.add_ecl_profiles(list(profiles))
+        data = [
+            profile["Data"]["Data"]
+            for profile in request.data()["Adjustments"]["Profiles"]
+        ]
+        return data, index.production.call_count
+
+    (first,), calls = build(EclProfile("ID1", "FOPT"))
+    assert calls == 1
+    assert Path("production.json").exists()
+
+    # Only the multipliers changed
+    (rescaled,), calls = build(EclProfile("ID1", "FOPT", global_multiplier=2))
+    assert calls == 0
+    assert rescaled == pytest.approx([2 * value for value in first])
+
+    # A new key is extracted, the cached one is reused
+    _, calls = build(EclProfile("ID1", "FOPT"), EclProfile("ID1", "FGPT"))
+    assert calls == 1
+
+    # A rerun of the simulation invalidates the cache
+    create_case(
+        func_table={
+            "FOPT": lambda days: 2 * days,
+            "FOPR": lambda _: 1,
+            "FGPT": lambda days: days,
+        }
+    ).fwrite()
+    smspec = Path("CSV.SMSPEC")
+    os.utime(smspec, ns=(smspec.stat().st_atime_ns, smspec.stat().st_mtime_ns + 10**9))
+    (changed,), calls = build(EclProfile("ID1", "FOPT"))
+    assert calls == 1
+    assert changed == pytest.approx([2 * value for value in first])
+
+
+def test_mapped_summary_matches_resdata(tmpdir):
+    os.chdir(tmpdir)
+    # More wells than the 1000 values in a record of the UNSMRY file
+    wells = [f"OP_{number}" for number in range(1200)]
+    func_table = {"FOPT": lambda days: days, "BPR:12,1,1": lambda _: 250.0}
+    for number, well in enumerate(wells):
+        func_table[f"WOPT:{well}"] = lambda days, number=number: number * days
+    create_case(
+        keys=[
+            ("FOPT", None, 0, "SM3"),
+            ("BPR", None, 12, "BARS"),
+            *[("WOPT", well, 0, "SM3") for well in wells],
+        ],
+        func_table=func_table,
+        sim_start=datetime.date(2010, 3, 1),
+        sim_days=2000,
+    ).fwrite()
+
+    case = Summary("CSV")
+    mapped = MappedSummary("CSV")
+
+    assert {"FOPT", "BPR:12", "BPR:12,1,1", "WOPT:OP_1199"} <= set(mapped.keys())
+    assert "WOPT:OP_1200" not in mapped
+    assert mapped.start_date == case.start_date
+    assert mapped.end_date == case.end_date
+    assert mapped.get_data_start_time() == case.get_data_start_time()
+    assert mapped.get_end_time() == case.get_end_time()
+    assert mapped.unit("BPR:12,1,1") == "BARS"
+    for key in ("FOPT", "WOPT:OP_7", "WOPT:OP_999", "WOPT:OP_1000", "WOPT:OP_1199"):
+        assert mapped.last_value(key) == case.last_value(key)
+        date = datetime.datetime(2012, 7, 14, 6)
+        assert mapped.get_interp(key, date=date) == pytest.approx(
+            case.get_interp(key, date=date)
+        )
+        for start_date in (case.start_date, datetime.date(2011, 5, 17)):
+            assert YearlyIndex(mapped).production(
+                key, start_date, case.end_date
+            ) == pytest.approx(
+                YearlyIndex(case).production(key, start_date, case.end_date)
+            )
+    with pytest.raises(ValueError, match="outside range of simulation data"):
+        mapped.get_interp("FOPT", date=datetime.datetime(2020, 1, 1))
+
+
+def test_summary_reader_mmap(tmpdir, mock_project):
+    os.chdir(tmpdir)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.RESULTS: ["npv"],
+        SteaInputKeys.ECL_CASE: "CSV.UNSMRY",
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    Path("mmap_config_file").write_text(
+        yaml.dump({**config, "summary-reader": "mmap"}), encoding="utf-8"
+    )
+    create_case().fwrite()
+
+    stea_input = SteaInput("mmap_config_file")
+    assert isinstance(stea_input.ecl_case, MappedSummary)
+    assert stea_input.ecl_case.base == "CSV"
+
+    profiles = [
+        EclProfile("ID1", "FOPT"),
+        EclProfile("ID2", "FGPT", start_date=datetime.date(2010, 7, 1)),
+    ]
+    mapped = SteaRequest(stea_input, mock_project)
+    mapped.add_ecl_profiles(profiles)
+    request = SteaRequest(SteaInput("config_file"), mock_project)
+    request.add_ecl_profiles(profiles)
+    for mapped_profile, profile in zip(
+        mapped.data()["Adjustments"]["Profiles"],
+        request.data()["Adjustments"]["Profiles"],
+        strict=True,
+    ):
+        assert mapped_profile["Data"]["StartYear"] == profile["Data"]["StartYear"]
+        assert mapped_profile["Data"]["Data"] == pytest.approx(profile["Data"]["Data"])
+
+    with pytest.raises(FileNotFoundError, match=r"No such summary file: .*\.SMSPEC"):
+        MappedSummary("MISSING")
+
+
 def test_config_not_exists(tmpdir):
     os.chdir(tmpdir)
     with pytest.raises(
@@ -488,6 +755,165 @@ def test_calculate(set_up, tmpdir):
     assert pytest.approx(results.results(SteaKeys.PRETAX)["IRR"]) == -0.205244738
 
 
+def test_calculate_returns_project_and_request(tmpdir, httpserver, mock_result):
+    os.chdir(tmpdir)
+    case = create_case()
+    case.fwrite()
+    httpserver.expect_oneshot_request(
+        PROJECT_URL,
+        query_string="ConfigurationDate=2018-10-10T12:00:00",
+    ).respond_with_json(PROJECT)
+    httpserver.expect_oneshot_request(
+        "/api/v1/Calculate/", method="POST"
+    ).respond_with_json(mock_result)
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.SERVER: httpserver.url_for("").rstrip("/"),
+        SteaInputKeys.RESULTS: ["NPV"],
+        SteaInputKeys.ECL_CASE: "CSV",
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+
+    result = calculate(SteaInput("config_file"))
+
+    httpserver.check_assertions()
+    assert result.results(SteaKeys.CORPORATE) == {"NPV": 456}
+    assert result.project.has_profile("ID1")
+    assert result.request.data()[SteaKeys.PROJECT_ID] == 1234
+
+
+def test_calculate_from_config_overlaps_project_and_case(tmpdir, monkeypatch):
+    os.chdir(tmpdir)
+    create_case().fwrite()
+    from_config = SteaInput.from_config.__func__
+
+    def slow_from_config(cls, config, ecl_case=None):
+        time.sleep(0.3)
+        return from_config(cls, config, ecl_case)
+
+    monkeypatch.setattr(SteaInput, "from_config", classmethod(slow_from_config))
+
+    with FakeSteaServer(PROJECT, latency=0.3) as server:
+        config = minimal_config(ecl_case="CSV", stea_server=server.url)
+        timings = Timings()
+        start = time.perf_counter()
+        result = stea.calculate_from_config(config, timings)
+        elapsed = time.perf_counter() - start
+
+    assert result.project.has_profile("ID1")
+    assert result.results(SteaKeys.PRETAX)["NPV"] > 0
+    assert timings.phases["project_get"] >= 0.3
+    assert timings.phases["summary_load"] >= 0.3
+    # The project is fetched while the case is loaded, and only the
+    # calculation waits for the server afterwards
+    assert elapsed < 0.9
+    assert timings.data()["total"] < sum(timings.phases.values())
+
+
+def test_calculate_from_config_checks_profiles_before_extraction(
+    tmpdir, httpserver, monkeypatch
+):
+    os.chdir(tmpdir)
+    create_case().fwrite()
+    httpserver.expect_oneshot_request(PROJECT_URL).respond_with_json(
+        {
+            SteaKeys.PROJECT_ID: 1234,
+            SteaKeys.PROJECT_VERSION: 1,
+            SteaKeys.PROFILES: [
+                {
+                    SteaKeys.PROFILE_ID: "ID1",
+                    SteaKeys.UNIT: "Sm3",
+                    SteaInputKeys.PROFILE_KEY: "Oil",
+                }
+            ],
+        }
+    )
+    production = mock.MagicMock()
+    monkeypatch.setattr(YearlyIndex, "production", production)
+    config = minimal_config(
+        ecl_profiles={"Oil": {"ecl_key": "FOPT"}, "ID2": {"ecl_key": "FGPT"}},
+        profiles={"Gas": {"start_year": 2020, "data": [1, 2]}},
+        ecl_case="CSV",
+        stea_server=httpserver.url_for("").rstrip("/"),
+    )
+
+    with pytest.raises(
+        KeyError, match="No profiles with id or description ID2, Gas in project 1234"
+    ):
+        stea.calculate_from_config(config)
+    production.assert_not_called()
+
+
+def test_calculate_many(tmpdir, httpserver, mock_result):
+    os.chdir(tmpdir)
+    httpserver.expect_oneshot_request(
+        PROJECT_URL,
+        query_string="ConfigurationDate=2018-10-10T12:00:00",
+    ).respond_with_json(PROJECT)
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_json(
+        mock_result
+    )
+    config = {
+        SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+        SteaInputKeys.PROJECT_ID: 1234,
+        SteaInputKeys.PROJECT_VERSION: 1,
+        SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+        SteaInputKeys.SERVER: httpserver.url_for("").rstrip("/"),
+        SteaInputKeys.RESULTS: ["NPV"],
+    }
+    Path("config_file").write_text(yaml.dump(config), encoding="utf-8")
+    cases = []
+    for index in range(4):
+        create_case(case=f"CASE{index}").fwrite()
+        cases.append(SteaInput("config_file", f"CASE{index}"))
+
+    results = asyncio.run(calculate_many(cases, max_concurrency=2))
+
+    httpserver.check_assertions()
+    assert [result.stea_input for result in results] == cases
+    assert all(result.results(SteaKeys.CORPORATE) == {"NPV": 456} for result in results)
+    assert len(httpserver.log) == 5
+
+
+def test_calculate_many_cancels_pending_on_failure(tmpdir, httpserver, mock_result):
+    os.chdir(tmpdir)
+    httpserver.expect_request(PROJECT_URL).respond_with_json(PROJECT)
+    httpserver.expect_request("/api/v1/Alternative/4321/1/summary").respond_with_data(
+        "missing", status=404
+    )
+
+    def slow_result(_):
+        time.sleep(0.2)
+        return Response(json.dumps(mock_result), content_type="application/json")
+
+    httpserver.expect_request("/api/v1/Calculate/", method="POST").respond_with_handler(
+        slow_result
+    )
+    create_case(case="CASE").fwrite()
+    cases = []
+    for project_id in [1234, 1234, 4321]:
+        config = {
+            SteaInputKeys.CONFIG_DATE: datetime.datetime(2018, 10, 10, 12, 0, 0),
+            SteaInputKeys.PROJECT_ID: project_id,
+            SteaInputKeys.PROJECT_VERSION: 1,
+            SteaInputKeys.ECL_PROFILES: {"ID1": {SteaInputKeys.ECL_KEY: "FOPT"}},
+            SteaInputKeys.SERVER: httpserver.url_for("").rstrip("/"),
+            SteaInputKeys.RESULTS: ["NPV"],
+        }
+        Path(f"config_{project_id}").write_text(yaml.dump(config), encoding="utf-8")
+        cases.append(SteaInput(f"config_{project_id}", "CASE"))
+
+    async def run():
+        with pytest.raises(RuntimeError, match=r"HTTP GET from .*4321.* failed"):
+            await calculate_many(cases)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(run()) == set()
+
+
 def test_results(set_up, tmpdir, mock_result):
     os.chdir(tmpdir)
     case = create_case()
@@ -522,6 +948,25 @@ def test_results(set_up, tmpdir, mock_result):
     assert res["NPV"] == 456
 
 
+def test_result_records(mock_project, mock_result):
+    result = SteaResult(
+        mock_result, None, project=mock_project, request=profile_request([1.0, 2.0])
+    )
+
+    assert result.records() == {
+        "values": {
+            "tax_mode": [SteaKeys.PRETAX, SteaKeys.CORPORATE],
+            "key": ["NPV", "NPV"],
+            "value": [123, 456],
+        },
+        "profiles": {
+            "profile_id": ["ID1", "ID1"],
+            "year": [2020, 2021],
+            "value": [1.0, 2.0],
+        },
+    }
+
+
 @pytest.mark.skipif(not online(), reason="Must be on Equinor network")
 def test_mult(set_up, tmpdir):
     os.chdir(tmpdir)